@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Request, Depends
 from fastapi.responses import StreamingResponse
 import asyncio
+import multiprocessing
 import sys
 from routers import chat, user, settings, integrations, knowledge
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,6 +12,7 @@ from config import scheduler
 from deps import user_exists
 import os
 from utils.logging_config import logger
+from utils.voice.tts import prewarm_tts, shutdown_tts
 from pydantic import BaseModel
 import uvicorn
 
@@ -28,7 +30,9 @@ if sys.platform.startswith("win"):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     scheduler.start()
+    await prewarm_tts()
     yield
+    shutdown_tts()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -102,6 +106,8 @@ async def sse_endpoint(request: Request):
 
 
 if __name__ == "__main__":
+    # Required for the file converter's process pool in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     config = uvicorn.Config(app, host="0.0.0.0", port=5089, log_level="info")
     server = uvicorn.Server(config)
 
@@ -115,4 +121,11 @@ if __name__ == "__main__":
 
         await task  # keep running until shutdown
 
-    asyncio.run(start_server())
\ No newline at end of file
+    # uvloop (POSIX only) gives a faster event loop; fall back to asyncio elsewhere
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+
+    run(start_server())
\ No newline at end of file
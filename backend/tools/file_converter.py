@@ -1,28 +1,36 @@
+import atexit
 import os
+import re
+import concurrent.futures
+import shutil
 import sys
+import json
+import importlib.util
 from pathlib import Path
 from typing import List, Optional
 import logging
 import magic
 import asyncio
 
-# Third-party imports
+# Heavy third-party packages (reportlab, pandas, moviepy, pydub, ...) are imported
+# inside the conversion methods that need them, so only the presence of the
+# packages is checked here.
+_REQUIRED_PACKAGES = {
+    'PIL': 'pillow',
+    'pandas': 'pandas',
+    'docx': 'python-docx',
+    'reportlab': 'reportlab',
+    'PyPDF2': 'PyPDF2',
+}
+
 try:
-    from PIL import Image
-    import pandas as pd
-    from docx import Document
-    import json
-    
-    # PDF-specific imports
-    from reportlab.lib.pagesizes import A4
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.lib import colors
-    from PyPDF2 import PdfReader, PdfWriter
-    
     # Agno imports
     from agno.tools import Toolkit
 
+    for _module, _package in _REQUIRED_PACKAGES.items():
+        if importlib.util.find_spec(_module) is None:
+            raise ImportError(f"No module named '{_module}' ({_package})")
+
 except ImportError as e:
     print(f"Missing required package: {e}")
     print("Please install required packages with:")
@@ -30,19 +38,13 @@ except ImportError as e:
     sys.exit(1)
 
 # Optional imports for video and audio
-try:
-    from moviepy import VideoFileClip
-    VIDEO_SUPPORT = True
-except ImportError:
-    VIDEO_SUPPORT = False
+VIDEO_SUPPORT = importlib.util.find_spec('moviepy') is not None
+if not VIDEO_SUPPORT:
     print("Warning: moviepy not found. Video conversions will be disabled.")
     print("To enable video features: pip install moviepy and install FFmpeg")
 
-try:
-    from pydub import AudioSegment
-    AUDIO_SUPPORT = True
-except ImportError:
-    AUDIO_SUPPORT = False
+AUDIO_SUPPORT = importlib.util.find_spec('pydub') is not None
+if not AUDIO_SUPPORT:
     print("Warning: pydub not found. Audio conversions will be disabled.")
     print("To enable audio features: pip install pydub")
 
@@ -58,8 +60,72 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+_HTML_TAG_RE = re.compile(r'<[^<]+?>', re.DOTALL)
+_MD_FMT_RE = re.compile(r'[#*`_]')
+
 BASE_DIR = r"artifacts/"
 
+# Pillow work is CPU bound and holds the GIL, so image conversions run in worker
+# processes. The pool is created on first use and shared by all toolkit instances.
+# Batch conversions default to the same width, so they never queue behind the pool.
+_CPU_WORKERS = os.cpu_count() or 1
+_CPU_POOL: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def _get_cpu_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _CPU_POOL
+    if _CPU_POOL is None:
+        _CPU_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=_CPU_WORKERS)
+        atexit.register(_shutdown_cpu_pool)
+    return _CPU_POOL
+
+
+def _shutdown_cpu_pool() -> None:
+    """Stop the worker processes, dropping conversions that have not started."""
+    global _CPU_POOL
+    if _CPU_POOL is not None:
+        _CPU_POOL.shutdown(wait=True, cancel_futures=True)
+        _CPU_POOL = None
+
+
+async def _run_subprocess(*cmd: str) -> Optional[tuple[int, bytes]]:
+    """Run a command without blocking the event loop.
+
+    Returns (returncode, stderr), or None when the running event loop cannot
+    spawn subprocesses (e.g. the selector event loop on Windows).
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except NotImplementedError:
+        return None
+    _, stderr = await process.communicate()
+    return process.returncode, stderr
+
+
+def _convert_image_sync(input_path: str, output_path: str, output_ext: str) -> bool:
+    """Convert an image in the current process. Module level so it can be pickled."""
+    from PIL import Image
+
+    with Image.open(input_path) as img:
+        # Convert RGBA to RGB if saving as JPEG
+        if output_ext in ('.jpg', '.jpeg') and img.mode == 'RGBA':
+            img = img.convert('RGB')
+
+        # Special handling for PDF
+        if output_ext == '.pdf':
+            if img.mode == 'RGBA':
+                img = img.convert('RGB')
+            img.save(output_path, 'PDF')
+        else:
+            img.save(output_path)
+
+    return True
+
 
 class FileConverterToolkit(Toolkit):
     """Universal file converter with advanced PDF features, structured as an Agno Toolkit."""
@@ -104,12 +170,30 @@ class FileConverterToolkit(Toolkit):
                 'input': ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', '.opus'],
                 'output': ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a', '.opus']
             }
+
+        # Every supported input extension, used to filter directory listings
+        self._all_exts = {ext.lower() for formats in self.supported_formats.values() for ext in formats['input']}
+
+        # Flat extension -> file type lookup (first category listing an extension wins)
+        self._ext_to_type = {}
+        for file_type, formats in self.supported_formats.items():
+            for ext in formats['input']:
+                self._ext_to_type.setdefault(ext.lower(), file_type)
+
+        self._dispatch = {
+            'image': self.convert_image,
+            'video': self.convert_video,
+            'audio': self.convert_audio,
+            'document': self.convert_document,
+            'spreadsheet': self.convert_spreadsheet,
+            'pdf': self.convert_pdf,
+        }
     
     def detect_file_type(self, file_path: str) -> tuple[Optional[str], str]:
         """Detect file type and extension automatically."""
         try:
             # Get actual file extension
-            actual_ext = Path(file_path).suffix.lower()
+            actual_ext = os.path.splitext(file_path)[1].lower()
             
             # Use python-magic to detect MIME type if available
             if MAGIC_SUPPORT:
@@ -158,46 +242,33 @@ class FileConverterToolkit(Toolkit):
         except Exception as e:
             logger.warning(f"Could not detect file type for {file_path}: {e}")
             # Fallback to extension-based detection
-            ext = Path(file_path).suffix.lower()
+            ext = os.path.splitext(file_path)[1].lower()
             return self.get_file_type_by_extension(ext), ext
     
     def get_file_type_by_extension(self, ext: str) -> Optional[str]:
         """Get file type category by extension."""
-        for file_type, formats in self.supported_formats.items():
-            if ext in formats['input']:
-                return file_type
-        return None
+        return self._ext_to_type.get(ext)
     
     async def convert_image(self, input_path: str, output_path: str) -> bool:
         """Convert image files."""
+        output_ext = os.path.splitext(output_path)[1].lower()
         try:
-            def _convert():
-                with Image.open(input_path) as img:
-                    # Convert RGBA to RGB if saving as JPEG
-                    if output_path.lower().endswith(('.jpg', '.jpeg')) and img.mode == 'RGBA':
-                        img = img.convert('RGB')
-                    
-                    # Special handling for PDF
-                    if output_path.lower().endswith('.pdf'):
-                        if img.mode == 'RGBA':
-                            img = img.convert('RGB')
-                        img.save(output_path, 'PDF')
-                    else:
-                        img.save(output_path)
-                    
-                    logger.info(f"Image converted: {input_path} -> {output_path}")
-                    return True
-            return await asyncio.to_thread(_convert)
+            loop = asyncio.get_running_loop()
+            success = await loop.run_in_executor(_get_cpu_pool(), _convert_image_sync, input_path, output_path, output_ext)
+            logger.info(f"Image converted: {input_path} -> {output_path}")
+            return success
         except Exception as e:
             logger.error(f"Error converting image: {e}")
             return False
     
     async def convert_video(self, input_path: str, output_path: str) -> bool:
         """Convert video files."""
+        output_ext = os.path.splitext(output_path)[1].lower()
         try:
             def _convert():
+                from moviepy import VideoFileClip
+
                 video = VideoFileClip(input_path)
-                output_ext = Path(output_path).suffix.lower()
                 
                 # Handle audio extraction from video
                 if output_ext in ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a']:
@@ -245,13 +316,29 @@ class FileConverterToolkit(Toolkit):
     
     async def convert_audio(self, input_path: str, output_path: str) -> bool:
         """Convert audio files."""
+        # Get output format
+        output_format = os.path.splitext(output_path)[1][1:].lower()
         try:
+            # Drive ffmpeg directly when available so conversions overlap without holding a thread each
+            ffmpeg = shutil.which('ffmpeg')
+            if ffmpeg:
+                cmd = [ffmpeg, '-y', '-loglevel', 'error', '-i', input_path]
+                if output_format == 'mp3':
+                    cmd += ['-b:a', '192k']
+                result = await _run_subprocess(*cmd, output_path)
+                if result is not None:
+                    returncode, stderr = result
+                    if returncode != 0:
+                        logger.error(f"Error converting audio: {stderr.decode(errors='ignore').strip()}")
+                        return False
+                    logger.info(f"Audio converted: {input_path} -> {output_path}")
+                    return True
+
             def _convert():
+                from pydub import AudioSegment
+
                 audio = AudioSegment.from_file(input_path)
                 
-                # Get output format
-                output_format = Path(output_path).suffix[1:].lower()
-                
                 # Export with appropriate parameters
                 if output_format == 'mp3':
                     audio.export(output_path, format="mp3", bitrate="192k")
@@ -271,10 +358,13 @@ class FileConverterToolkit(Toolkit):
     
     async def convert_document_to_pdf(self, input_path: str, output_path: str) -> bool:
         """Convert various document formats to PDF."""
+        input_ext = os.path.splitext(input_path)[1].lower()
         try:
             def _convert():
-                input_ext = Path(input_path).suffix.lower()
-                
+                from reportlab.lib.pagesizes import A4
+                from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+                from reportlab.lib.styles import getSampleStyleSheet
+
                 # Create PDF document
                 doc = SimpleDocTemplate(output_path, pagesize=A4)
                 styles = getSampleStyleSheet()
@@ -292,6 +382,8 @@ class FileConverterToolkit(Toolkit):
                                 story.append(Spacer(1, 12))
                 
                 elif input_ext == '.docx':
+                    from docx import Document
+
                     docx_doc = Document(input_path)
                     for paragraph in docx_doc.paragraphs:
                         if paragraph.text.strip():
@@ -302,8 +394,7 @@ class FileConverterToolkit(Toolkit):
                     with open(input_path, 'r', encoding='utf-8') as f:
                         html_content = f.read()
                         # Simple HTML to text conversion (basic)
-                        import re
-                        text = re.sub('<[^<]+?>', '', html_content)
+                        text = _HTML_TAG_RE.sub('', html_content)
                         paragraphs = text.split('\n')
                         for para in paragraphs:
                             if para.strip():
@@ -314,9 +405,8 @@ class FileConverterToolkit(Toolkit):
                     with open(input_path, 'r', encoding='utf-8') as f:
                         md_content = f.read()
                         # Basic markdown to text conversion
-                        import re
                         # Remove markdown formatting
-                        text = re.sub(r'[#*`_]', '', md_content)
+                        text = _MD_FMT_RE.sub('', md_content)
                         paragraphs = text.split('\n\n')
                         for para in paragraphs:
                             if para.strip():
@@ -334,10 +424,14 @@ class FileConverterToolkit(Toolkit):
     
     async def convert_spreadsheet_to_pdf(self, input_path: str, output_path: str) -> bool:
         """Convert spreadsheet to PDF."""
+        input_ext = os.path.splitext(input_path)[1].lower()
         try:
             def _convert():
-                input_ext = Path(input_path).suffix.lower()
-                
+                import pandas as pd
+                from reportlab.lib.pagesizes import A4
+                from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+                from reportlab.lib import colors
+
                 # Read spreadsheet
                 if input_ext == '.csv':
                     df = pd.read_csv(input_path)
@@ -383,24 +477,23 @@ class FileConverterToolkit(Toolkit):
     
     async def convert_document(self, input_path: str, output_path: str) -> bool:
         """Convert document files."""
+        input_ext = os.path.splitext(input_path)[1].lower()
+        output_ext = os.path.splitext(output_path)[1].lower()
         try:
             def _convert():
-                output_ext = Path(output_path).suffix.lower()
-                
                 # Handle PDF conversion
                 if output_ext == '.pdf':
                     # Note: This needs to be handled differently since we're in a sync context
                     return True  # Will be handled by calling convert_document_to_pdf separately
                 
-                # Handle other document conversions
-                input_ext = Path(input_path).suffix.lower()
-                
                 # Read input file
                 content = ""
                 if input_ext == '.txt':
                     with open(input_path, 'r', encoding='utf-8') as f:
                         content = f.read()
                 elif input_ext == '.docx':
+                    from docx import Document
+
                     doc = Document(input_path)
                     content = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
                 elif input_ext == '.html':
@@ -415,6 +508,8 @@ class FileConverterToolkit(Toolkit):
                     with open(output_path, 'w', encoding='utf-8') as f:
                         f.write(content)
                 elif output_ext == '.docx':
+                    from docx import Document
+
                     doc = Document()
                     doc.add_paragraph(content)
                     doc.save(output_path)
@@ -439,8 +534,6 @@ class FileConverterToolkit(Toolkit):
                 logger.info(f"Document converted: {input_path} -> {output_path}")
                 return True
             
-            output_ext = Path(output_path).suffix.lower()
-            
             # Handle PDF conversion separately since it's async
             if output_ext == '.pdf':
                 return await self.convert_document_to_pdf(input_path, output_path)
@@ -453,18 +546,17 @@ class FileConverterToolkit(Toolkit):
     
     async def convert_spreadsheet(self, input_path: str, output_path: str) -> bool:
         """Convert spreadsheet files."""
+        input_ext = os.path.splitext(input_path)[1].lower()
+        output_ext = os.path.splitext(output_path)[1].lower()
         try:
             def _convert():
-                output_ext = Path(output_path).suffix.lower()
-                
                 # Handle PDF conversion
                 if output_ext == '.pdf':
                     # Note: This needs to be handled differently since we're in a sync context
                     return True  # Will be handled by calling convert_spreadsheet_to_pdf separately
                 
-                # Handle other spreadsheet conversions
-                input_ext = Path(input_path).suffix.lower()
-                
+                import pandas as pd
+
                 # Read input file
                 if input_ext == '.csv':
                     df = pd.read_csv(input_path)
@@ -498,20 +590,48 @@ class FileConverterToolkit(Toolkit):
         input_files_resolved = [str(self._resolve_path(p)) for p in input_files]
         output_path_resolved = str(self._resolve_path(output_path))
         try:
-            def _merge():
-                pdf_writer = PdfWriter()
+            def _existing_inputs():
+                existing = []
                 for input_file in input_files_resolved:
                     if not os.path.exists(input_file):
                         logger.warning(f"File not found: {input_file}")
                         continue
+                    existing.append(input_file)
+                os.makedirs(os.path.dirname(output_path_resolved), exist_ok=True)
+                return existing
+
+            existing_files = await asyncio.to_thread(_existing_inputs)
+
+            # A single input is just a copy, no need to parse and rewrite it
+            if len(existing_files) == 1:
+                await asyncio.to_thread(shutil.copyfile, existing_files[0], output_path_resolved)
+                logger.info(f"PDFs merged: 1 file -> {output_path_resolved}")
+                return True
+
+            # Prefer qpdf when installed, it is considerably faster than PyPDF2 for large merges
+            qpdf = shutil.which('qpdf')
+            if qpdf and existing_files:
+                result = await _run_subprocess(qpdf, '--empty', '--pages', *existing_files, '--', output_path_resolved)
+                if result is not None:
+                    returncode, stderr = result
+                    # qpdf exits with 3 when it succeeded with warnings
+                    if returncode in (0, 3):
+                        logger.info(f"PDFs merged: {len(existing_files)} files -> {output_path_resolved}")
+                        return True
+                    logger.warning(f"qpdf merge failed, falling back to PyPDF2: {stderr.decode(errors='ignore').strip()}")
+
+            def _merge():
+                from PyPDF2 import PdfReader, PdfWriter
+
+                pdf_writer = PdfWriter()
+                for input_file in existing_files:
                     with open(input_file, 'rb') as f:
                         pdf_reader = PdfReader(f)
                         for page in pdf_reader.pages:
                             pdf_writer.add_page(page)
-                os.makedirs(os.path.dirname(output_path_resolved), exist_ok=True)
                 with open(output_path_resolved, 'wb') as f:
                     pdf_writer.write(f)
-                logger.info(f"PDFs merged: {len(input_files_resolved)} files -> {output_path_resolved}")
+                logger.info(f"PDFs merged: {len(existing_files)} files -> {output_path_resolved}")
                 return True
             return await asyncio.to_thread(_merge)
         except Exception as e:
@@ -525,6 +645,8 @@ class FileConverterToolkit(Toolkit):
         output_dir_resolved = str(self._resolve_path(output_dir))
         try:
             def _split():
+                from PyPDF2 import PdfReader, PdfWriter
+
                 if not os.path.exists(input_path_resolved):
                     logger.error(f"Input file not found: {input_path_resolved}")
                     return False
@@ -556,6 +678,8 @@ class FileConverterToolkit(Toolkit):
         """Extract text from PDF."""
         try:
             def _extract():
+                from PyPDF2 import PdfReader
+
                 with open(input_path, 'rb') as f:
                     pdf_reader = PdfReader(f)
                     text = ""
@@ -575,14 +699,15 @@ class FileConverterToolkit(Toolkit):
     
     async def convert_pdf(self, input_path: str, output_path: str) -> bool:
         """Convert PDF to other formats."""
+        output_ext = os.path.splitext(output_path)[1].lower()
         try:
             def _convert():
-                output_ext = Path(output_path).suffix.lower()
-                
                 if output_ext == '.txt':
                     # Note: This needs to be handled differently since we're in a sync context
                     return True  # Will be handled by calling extract_pdf_text separately
                 elif output_ext == '.json':
+                    from PyPDF2 import PdfReader
+
                     # Extract text and save as JSON
                     with open(input_path, 'rb') as f:
                         pdf_reader = PdfReader(f)
@@ -608,8 +733,6 @@ class FileConverterToolkit(Toolkit):
                 
                 return False
             
-            output_ext = Path(output_path).suffix.lower()
-            
             # Handle text extraction separately since it's async
             if output_ext == '.txt':
                 return await self.extract_pdf_text(input_path, output_path)
@@ -654,27 +777,15 @@ class FileConverterToolkit(Toolkit):
             logger.error(f"Unsupported file type: {input_path}")
             return f"❌ Error: Unsupported file type for {input_path}"
         # Validate output format
-        output_ext = Path(output_path).suffix.lower()
+        output_ext = os.path.splitext(output_path)[1].lower()
         if output_ext not in self.supported_formats[file_type]['output']:
             logger.error(f"Unsupported output format {output_ext} for {file_type}")
             return f"❌ Error: Unsupported output format {output_ext} for {file_type} files."
         # Convert based on file type
-        success = False
-        if file_type == 'image':
-            success = await self.convert_image(input_path, output_path)
-        elif file_type == 'video':
-            success = await self.convert_video(input_path, output_path)
-        elif file_type == 'audio':
-            success = await self.convert_audio(input_path, output_path)
-        elif file_type == 'document':
-            success = await self.convert_document(input_path, output_path)
-        elif file_type == 'spreadsheet':
-            success = await self.convert_spreadsheet(input_path, output_path)
-        elif file_type == 'pdf':
-            success = await self.convert_pdf(input_path, output_path)
+        success = await self._dispatch[file_type](input_path, output_path)
         return f"✅ Successfully converted: {input_path} -> {output_path}" if success else f"❌ Failed to convert: {input_path}"
     
-    async def batch_convert(self, input_dir: str, output_dir: str, input_ext: Optional[str] = None, output_ext: Optional[str] = None) -> str:
+    async def batch_convert(self, input_dir: str, output_dir: str, input_ext: Optional[str] = None, output_ext: Optional[str] = None, max_concurrency: Optional[int] = None) -> str:
         """
         Convert multiple files in a directory.
 
@@ -683,6 +794,7 @@ class FileConverterToolkit(Toolkit):
             output_dir (str): The directory where converted files will be saved.
             input_ext (Optional[str]): The specific input extension to filter by (e.g., '.jpg').
             output_ext (Optional[str]): The target output extension (e.g., '.png').
+            max_concurrency (Optional[int]): Maximum number of files converted at the same time. Defaults to the CPU count.
 
         Returns:
             str: A summary of the batch conversion results.
@@ -690,33 +802,52 @@ class FileConverterToolkit(Toolkit):
         # NEW: resolve paths
         input_dir_path = self._resolve_path(input_dir)
         output_dir_path = self._resolve_path(output_dir)
-        if not await asyncio.to_thread(input_dir_path.exists):
+        # If no specific extension provided, process all supported files
+        if input_ext:
+            wanted = {input_ext.lower() if input_ext.startswith('.') else f".{input_ext.lower()}"}
+        else:
+            wanted = self._all_exts
+
+        def _prepare() -> list[tuple[Path, Path]]:
+            # Existence check, directory listing and output paths in a single thread hop
+            if not input_dir_path.exists():
+                raise FileNotFoundError(input_dir_path)
+            pairs = []
+            with os.scandir(input_dir_path) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False) or os.path.splitext(entry.name)[1].lower() not in wanted:
+                        continue
+                    file_path = Path(entry.path)
+                    if output_ext:
+                        output_file = output_dir_path / f"{file_path.stem}{output_ext}"
+                    else:
+                        output_file = output_dir_path / file_path.name
+                    pairs.append((file_path, output_file))
+            return pairs
+
+        try:
+            pairs = await asyncio.to_thread(_prepare)
+        except FileNotFoundError:
             logger.error(f"Input directory not found: {input_dir_path}")
             return f"❌ Error: Input directory not found at {input_dir_path}"
-        # If no specific extension provided, process all supported files
-        def _glob_files():
-            if input_ext:
-                return list(input_dir_path.glob(f"*{input_ext}"))
-            files = []
-            for ext_list in [formats['input'] for formats in self.supported_formats.values()]:
-                for ext in ext_list:
-                    files.extend(input_dir_path.glob(f"*{ext}"))
-            return files
-        files = await asyncio.to_thread(_glob_files)
-        if not files:
+        if not pairs:
             logger.warning(f"No supported files found in {input_dir_path}")
             return f"⚠️ No supported files found in {input_dir_path}"
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or _CPU_WORKERS))
+
+        async def _convert_one(file_path: Path, output_file: Path) -> str:
+            async with semaphore:
+                return await self.convert_file(str(file_path), str(output_file))
+
+        results = await asyncio.gather(*[_convert_one(f, o) for f, o in pairs], return_exceptions=True)
         successful = 0
         failed = 0
-        for file_path in files:
-            if output_ext:
-                output_file = output_dir_path / f"{file_path.stem}{output_ext}"
-            else:
-                output_file = output_dir_path / file_path.name
-            result = await self.convert_file(str(file_path), str(output_file))
-            if "Successfully" in result:
+        for (file_path, _), result in zip(pairs, results):
+            if isinstance(result, str) and "Successfully" in result:
                 successful += 1
             else:
+                if isinstance(result, BaseException):
+                    logger.error(f"Error converting {file_path}: {result}")
                 failed += 1
         summary = f"Batch conversion complete: {successful} successful, {failed} failed."
         logger.info(summary)
@@ -1,10 +1,12 @@
 # Not Working now, need to fix later
 
 from yt_dlp import YoutubeDL
+from cachetools import TTLCache
 
+import os
 import vlc
 import threading
-import time
+from urllib.parse import unquote, urlparse
 from agno.tools import Toolkit
 from agno.agent import Agent
 
@@ -14,33 +16,29 @@ class SongPlayer:
         self.player = None
         self.lock = threading.Lock()
         self.current_url = None
-        self.status_thread = None
-        self.running = False
-
-    def _start_status_thread(self):
-        if not self.status_thread or not self.status_thread.is_alive():
-            self.running = True
-            self.status_thread = threading.Thread(target=self._status_updater, daemon=True)
-            self.status_thread.start()
-
-    def _status_updater(self):
-        while self.running:
-            time.sleep(1)
-            with self.lock:
-                if self.player:
-                    if self.player.get_state() == vlc.State.Ended:
-                        self.stop()
-                        break
+
+    def _attach_events(self, player):
+        """Stop the player when VLC reports the end of the stream or an error."""
+        events = player.event_manager()
+        for event_type in (vlc.EventType.MediaPlayerEndReached, vlc.EventType.MediaPlayerEncounteredError):
+            events.event_attach(event_type, lambda event, p=player: self._on_finished(p))
+
+    def _on_finished(self, player):
+        # libvlc must not be called back from its own event thread, so stop from a new thread
+        threading.Thread(target=self._stop_player, args=(player,), daemon=True).start()
 
     def play(self, url):
+        # Opening the stream may block on the network, so keep it outside the lock
+        new_player = vlc.MediaPlayer(url)
+        self._attach_events(new_player)
+        new_player.play()
         with self.lock:
-            if self.player:
-                self.player.stop()
-                self.player.release()
-            self.player = vlc.MediaPlayer(url)
-            self.player.play()
+            old_player = self.player
+            self.player = new_player
             self.current_url = url
-            self._start_status_thread()
+        if old_player:
+            old_player.stop()
+            old_player.release()
 
     def pause(self):
         with self.lock:
@@ -48,13 +46,22 @@ class SongPlayer:
                 self.player.pause()
 
     def stop(self):
+        self._stop_player()
+
+    def _stop_player(self, expected=None):
+        """Detach the current player under the lock, then stop it outside the lock.
+
+        When expected is given, only stop if it is still the current player.
+        """
         with self.lock:
-            if self.player:
-                self.player.stop()
-                self.player.release()
-                self.player = None
+            player = self.player
+            if expected is not None and player is not expected:
+                return
+            self.player = None
             self.current_url = None
-            self.running = False
+        if player:
+            player.stop()
+            player.release()
 
     def is_playing(self):
         with self.lock:
@@ -162,17 +169,42 @@ class MusicPlayerToolkit(Toolkit):
         return f"Status: {status['status'].capitalize()} {title_str}- {status['played']} / {status['total']} ({status['progress']}%)"
 
 
+# A single long-lived extractor; YoutubeDL setup (extractors, cookies) is costly
+_YDL = YoutubeDL({
+    'format': 'bestaudio/best',
+    'quiet': True,
+    'default_search': 'ytsearch1',  # get only top result
+})
+_YDL_LOCK = threading.Lock()
+
+# Direct links to these formats are played as-is without going through yt-dlp
+_DIRECT_AUDIO_EXTS = {'.mp3', '.m4a', '.aac', '.ogg', '.webm', '.opus', '.wav', '.flac'}
+
+# Resolved stream URLs expire after a few hours, so keep lookups for one hour
+_url_cache = TTLCache(maxsize=256, ttl=3600)
+_url_cache_lock = threading.Lock()
+
+
 def get_audio_stream_url(query: str) -> str:
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'quiet': True,
-        'default_search': 'ytsearch1',  # get only top result
-    }
-
-    with YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(query, download=False)
-        video = info['entries'][0] if 'entries' in info else info
-        return video['url'], video['title']
+    # Direct audio links need no extraction; yt-dlp already skips default_search for other URLs
+    if query.startswith(('http://', 'https://')):
+        path = urlparse(query).path
+        if os.path.splitext(path)[1].lower() in _DIRECT_AUDIO_EXTS:
+            return query, unquote(os.path.basename(path))
+
+    with _url_cache_lock:
+        cached = _url_cache.get(query)
+    if cached is not None:
+        return cached
+
+    with _YDL_LOCK:
+        info = _YDL.extract_info(query, download=False)
+    video = info['entries'][0] if 'entries' in info else info
+    result = video['url'], video['title']
+
+    with _url_cache_lock:
+        _url_cache[query] = result
+    return result
 
 
 # Example usage
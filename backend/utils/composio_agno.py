@@ -1,11 +1,11 @@
 import json
 import typing as t
+from collections import OrderedDict
 from inspect import Signature
 from typing import Sequence, TypeAlias
 
 from agno.tools.toolkit import Toolkit
 from typing_extensions import Protocol
-from pydantic import validate_call
 
 from composio.core.provider import AgenticProvider, AgenticProviderExecuteFn
 from composio.types import Tool
@@ -33,7 +33,6 @@ class SerializableToolFunction:
         self.__name__ = name
         self._execute_tool = None
         
-    @validate_call
     def __call__(self, *args, **kwargs) -> str:
         # Check if execute function is bound
         if self._execute_tool is None:
@@ -69,12 +68,41 @@ class AgnoProvider(AgenticProvider[Toolkit, AgnoToolCollection], name="agno"):
         if base_url is not None:
             kwargs["base_url"] = base_url
         super().__init__(**kwargs)
-    
+
     def _create_tool_function(self, tool: Tool, execute_tool: AgenticProviderExecuteFn) -> SerializableToolFunction:
         """Create a tool function from a Tool object"""
         description = tool.description or ""
         parameters = tool.input_parameters
+
+        # Tools are refetched on every wrap_tools call, so the key is built from content
+        cache_key = (tool.slug, description, json.dumps(parameters, sort_keys=True, default=str))
+        cached = self._fn_cache.get(cache_key)
+        if cached is None:
+            cached = self._build_tool_function_parts(description, parameters)
+            self._fn_cache[cache_key] = cached
+            if len(self._fn_cache) > self._FN_CACHE_SIZE:
+                self._fn_cache.popitem(last=False)
+        else:
+            self._fn_cache.move_to_end(cache_key)
+        sig, annotations, docstring = cached
         
+        # Create the serializable function
+        func = SerializableToolFunction(
+            tool_slug=tool.slug,
+            signature=sig,
+            # The cached dict is shared, so each function gets its own copy
+            annotations=dict(annotations),
+            docstring=docstring,
+            name=tool.slug.lower()
+        )
+        
+        # Bind the execute function
+        func.bind_execute_function(execute_tool)
+        
+        return func
+
+    def _build_tool_function_parts(self, description: str, parameters: dict) -> t.Tuple[Signature, dict, str]:
+        """Build the signature, annotations and docstring for a tool schema"""
         # Get function parameters from schema
         params = shared.get_signature_format_from_schema_params(
             schema_params=parameters,
@@ -98,40 +126,41 @@ class AgnoProvider(AgenticProvider[Toolkit, AgnoToolCollection], name="agno"):
             "\nReturns:\n    str: JSON string containing the function execution result"
         )
         docstring = "\n".join(docstring_parts)
-        
-        # Create the serializable function
-        func = SerializableToolFunction(
-            tool_slug=tool.slug,
-            signature=sig,
-            annotations=annotations,
-            docstring=docstring,
-            name=tool.slug.lower()
-        )
-        
-        # Bind the execute function
-        func.bind_execute_function(execute_tool)
-        
-        return func
+
+        return sig, annotations, docstring
     
+    # Signature, annotations and docstring per (slug, description, schema), shared across
+    # wrap_tools calls; least recently used entries are evicted past _FN_CACHE_SIZE
+    _FN_CACHE_SIZE = 256
+    _fn_cache: "OrderedDict[t.Tuple[str, str, str], t.Tuple[Signature, dict, str]]" = OrderedDict()
+
+    # Define app name mappings for special cases
+    _APP_MAPPINGS = {
+        'GOOGLEDRIVE': 'GOOGLE_DRIVE',
+        'GOOGLECALENDAR': 'GOOGLE_CALENDAR',
+        'GOOGLE_MAPS': 'GOOGLE_MAPS',
+        'ONE_DRIVE': 'ONE_DRIVE',
+        'COMPOSIO_SEARCH': 'COMPOSIO_SEARCH'
+    }
+
+    # Multi-word app prefixes, longest first so the longest match wins
+    _APP_PREFIXES = tuple(sorted(
+        ['GOOGLE_MAPS', 'ONE_DRIVE', 'COMPOSIO_SEARCH', 'GOOGLECALENDAR', 'GOOGLEDRIVE'],
+        key=len,
+        reverse=True,
+    ))
+
     def _extract_app_name(self, tool_slug: str) -> str:
         """Extract app name from tool slug with better logic"""
-        # Define app name mappings for special cases
-        app_mappings = {
-            'GOOGLEDRIVE': 'GOOGLE_DRIVE',
-            'GOOGLECALENDAR': 'GOOGLE_CALENDAR', 
-            'GOOGLE_MAPS': 'GOOGLE_MAPS',
-            'ONE_DRIVE': 'ONE_DRIVE',
-            'COMPOSIO_SEARCH': 'COMPOSIO_SEARCH'
-        }
-        
         # Check for multi-word app prefixes first
-        for prefix in ['GOOGLE_MAPS', 'ONE_DRIVE', 'COMPOSIO_SEARCH', 'GOOGLECALENDAR', 'GOOGLEDRIVE']:
-            if tool_slug.startswith(prefix):
-                return app_mappings.get(prefix, prefix)
+        if tool_slug.startswith(self._APP_PREFIXES):
+            for prefix in self._APP_PREFIXES:
+                if tool_slug.startswith(prefix):
+                    return self._APP_MAPPINGS.get(prefix, prefix)
         
         # Fallback to first word
-        first_part = tool_slug.split('_')[0] if '_' in tool_slug else tool_slug
-        return app_mappings.get(first_part, first_part)
+        first_part = tool_slug.split('_', 1)[0]
+        return self._APP_MAPPINGS.get(first_part, first_part)
 
     def wrap_tool(self, tool: Tool, execute_tool: AgenticProviderExecuteFn) -> Toolkit:
         """Transform a single tool with execute function (kept for compatibility)"""
@@ -1,32 +1,70 @@
+import atexit
 import json
 import os
+import threading
 from typing import Dict, Any, Literal, Optional
 from datetime import datetime
 from schemas import Profile, SettingsItem
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 DATA_DIR = "data"
 USER_FILE = os.path.join(DATA_DIR, "user.json")
 SETTINGS_CONFIG_FILE = os.path.join(DATA_DIR, "settings.json")
 
 
 def load_json(file):
-    if not os.path.exists(file):
-        return None
+    # Each handler reads its file once at startup, so there is nothing worth caching here
     try:
-        with open(file, "r") as f:
-            return json.load(f)
+        with open(file, "rb") as f:
+            raw = f.read()
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
     except (json.JSONDecodeError, FileNotFoundError):
         return None
 
 
+def save_json(file, data) -> None:
+    """Write data as JSON atomically: dump to a temp file, then swap it in."""
+    tmp_file = f"{file}.tmp"
+    try:
+        # Both paths write the same layout: 2-space indent, non-ASCII kept as UTF-8
+        if orjson is not None:
+            with open(tmp_file, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, file)
+    except Exception:
+        # Don't leave a half-written temp file behind
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
 class DataHandlerBase:
     """Base class for data handling operations"""
 
+    # Delay (seconds) used to coalesce rapid set() calls into a single write
+    FLUSH_DELAY = 0.1
+
     def __init__(self, file_path: str) -> None:
         self.file_path = file_path
+        self._write_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        # Bumped on every data change so derived values can be cached
+        self._version = 0
         self.data = self.load_data()
         # callbacks to notify subscribers after data changes
         self._callbacks = []
+        # Make sure debounced writes reach the disk on shutdown
+        atexit.register(self.flush_now)
 
         if not self.data:
             return None
@@ -37,12 +75,18 @@ class DataHandlerBase:
 
     def save_data(self, data: Dict[str, Any]) -> None:
         """Save data to JSON file"""
-        with open(self.file_path, "w") as f:
-            json.dump(data, f, indent=4)
-        
-        self.data = self.load_data()
-
-        # Notify registered callbacks about the updated data
+        with self._write_lock:
+            self._cancel_flush()
+            save_json(self.file_path, data)
+            self._dirty = False
+
+        # The written dict is already in memory, no need to read it back
+        self.data = data
+        self._version += 1
+        self._notify_callbacks()
+
+    def _notify_callbacks(self) -> None:
+        """Notify registered callbacks about the updated data"""
         for cb in getattr(self, "_callbacks", []):
             try:
                 cb(self.data)
@@ -50,6 +94,34 @@ class DataHandlerBase:
                 # Best-effort notify; don't fail the save if a callback errors
                 continue
 
+    def _cancel_flush(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _schedule_flush(self) -> None:
+        """Write the in-memory data after FLUSH_DELAY, restarting the delay on every call"""
+        with self._write_lock:
+            self._dirty = True
+            self._cancel_flush()
+            self._flush_timer = threading.Timer(self.FLUSH_DELAY, self.flush_now)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _update(self) -> None:
+        """Notify subscribers now and persist the in-memory data shortly after"""
+        self._version += 1
+        self._notify_callbacks()
+        self._schedule_flush()
+
+    def flush_now(self) -> None:
+        """Write any pending changes to disk immediately"""
+        with self._write_lock:
+            self._cancel_flush()
+            if self._dirty and self.data is not None:
+                save_json(self.file_path, self.data)
+                self._dirty = False
+
     def get(self, key: str, default=None):
         """Get a specific data field"""
         return self.data.get(key, default)
@@ -58,15 +130,18 @@ class DataHandlerBase:
         """Set a specific data field"""
         if self.data is None:
             return False
-        self.data[key] = value
-        self.save_data(self.data)
+        # The flush timer serializes self.data under this lock
+        with self._write_lock:
+            self.data[key] = value
+        self._update()
         return True
 
     def register_callback(self, func):
-        """Register a callback to be invoked after the data is saved.
+        """Register a callback to be invoked after the data changes.
 
-        The callback will be called with a single argument: the freshly loaded
-        data dict.
+        The callback will be called with a single argument: the current data
+        dict. Changes made through set() notify immediately, before the
+        debounced write reaches the disk.
         """
         if not hasattr(self, "_callbacks"):
             self._callbacks = []
@@ -89,7 +164,8 @@ class UserDataHandler(DataHandlerBase):
             return False
 
         current_time = datetime.now().isoformat()
-        self.data.setdefault("profile", {})["last_active"] = current_time
+        with self._write_lock:
+            self.data.setdefault("profile", {})["last_active"] = current_time
         self.save_data(self.data)
         return True
 
@@ -100,7 +176,8 @@ class UserDataHandler(DataHandlerBase):
 
     def save_profile(self, profile: Profile) -> bool:
         """Save user profile information"""
-        self.data["profile"] = profile.model_dump()
+        with self._write_lock:
+            self.data["profile"] = profile.model_dump()
         self.save_data(self.data)
         return True
 
@@ -119,17 +196,39 @@ class SettingsHandler(DataHandlerBase):
     ]
 
     def __init__(self) -> None:
+        self._index: Dict[str, tuple[str, int]] = {}
+        self._model_cache: Dict[str, tuple[int, list]] = {}
         super().__init__(SETTINGS_CONFIG_FILE)
 
+    def _build_index(self, data: Dict[str, Any]) -> None:
+        """Map every setting key to its (category, position) for O(1) lookups"""
+        index = {}
+        for category, items in data.items():
+            # Integrations may be stored keyed by name rather than as a list of items
+            if not isinstance(items, list):
+                continue
+            for i, item in enumerate(items):
+                index.setdefault(item["key"], (category, i))
+        self._index = index
+
+    def load_data(self) -> dict:
+        data = super().load_data()
+        self._build_index(data)
+        return data
+
+    def save_data(self, data: Dict[str, Any]) -> None:
+        self._build_index(data)
+        super().save_data(data)
+
     def get(self, key: str, default: Optional[Any] = None):
         if self.data is None:
             if default is not None:
                 return default
             raise ValueError(f"Setting '{key}' not found")
-        for _, items in self.data.items():
-            for item in items:
-                if item["key"] == key:
-                    return item["value"]
+        location = self._index.get(key)
+        if location is not None:
+            category, i = location
+            return self.data[category][i]["value"]
         if default is not None:
             return default
         raise ValueError(f"Setting '{key}' not found")
@@ -137,30 +236,34 @@ class SettingsHandler(DataHandlerBase):
     def set(self, key: str, value: Any) -> bool:
         if self.data is None:
             return False
-        for _, items in self.data.items():
-            for item in items:
-                if item["key"] == key:
-                    item["value"] = value
-                    self.save_data(self.data)
-                    return True
-        return False
+        location = self._index.get(key)
+        if location is None:
+            return False
+        category, i = location
+        # The flush timer serializes self.data under this lock
+        with self._write_lock:
+            self.data[category][i]["value"] = value
+        self._update()
+        return True
 
     def set_category(self, category: str, data) -> bool:
         if self.data is None:
             return False
-        
-        if isinstance(data, list):
-            self.data[category] = data
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                for item in self.data.get(category, []):
-                    if item["key"] == key:
-                        item["value"] = value
-                        break
-        else:
+        if not isinstance(data, (list, dict)):
             return False
-        
-        self.save_data(self.data)
+
+        # The flush timer serializes self.data under this lock
+        with self._write_lock:
+            if isinstance(data, list):
+                self.data[category] = data
+            else:
+                for key, value in data.items():
+                    for item in self.data.get(category, []):
+                        if item["key"] == key:
+                            item["value"] = value
+                            break
+            self._build_index(self.data)
+        self._update()
         return True
 
     def get_category(self, category):
@@ -170,23 +273,35 @@ class SettingsHandler(DataHandlerBase):
     
     def __getattr__(self, category: Literal["integrations", "general", "personalization", "configuration", "safety_and_security", "keyboard_shortcuts", "conversation"]):
         if category in self.CATEGORIES:
-            return [SettingsItem(**item) for item in self.data.get(category, [])]
+            cached = self._model_cache.get(category)
+            if cached and cached[0] == self._version:
+                return cached[1]
+            models = [SettingsItem(**item) for item in self.data.get(category, [])]
+            self._model_cache[category] = (self._version, models)
+            return models
         raise AttributeError(f"'SettingsHandler' object has no attribute '{category}'")
 
 
 class IntegrationsHandler():
     """Handler for integrations data operations"""
 
-    def __init__(self) -> None:
-        self.file_path = SETTINGS_CONFIG_FILE
+    def __init__(self, settings_handler: SettingsHandler) -> None:
+        # Integrations live in the settings file, so read and write through the settings handler
+        self._settings = settings_handler
+        self._index: Dict[str, Any] = {}
         self.data = self.load_data()
         self._callbacks = []
+        self._settings.register_callback(self._on_settings_changed)
 
     def load_data(self) -> dict:
-        """Load data from JSON file"""
-        if data := load_json(self.file_path):
-            return data.get("integrations", {})
-        return {}
+        """Load integrations from the settings data"""
+        raw = self._settings.data.get("integrations", []) if self._settings.data else []
+        # Index items by key; older files may already store integrations keyed by name
+        self._index = {item["key"]: item for item in raw} if isinstance(raw, list) else raw
+        return raw
+
+    def _on_settings_changed(self, _data) -> None:
+        self.data = self.load_data()
 
     def register_callback(self, func):
         """Register a callback to be invoked after the integrations data is saved.
@@ -198,15 +313,12 @@ class IntegrationsHandler():
 
     def save_data(self, data: Dict[str, Any]) -> None:
         """Save integrations data to the settings file"""
-        # Load the full settings data
-        full_data = load_json(self.file_path) or {}
-        # Update the integrations part
-        full_data["integrations"] = data
-        # Save the full data
-        with open(self.file_path, "w") as f:
-            json.dump(full_data, f, indent=4)
-        
-        # Reload and notify callbacks
+        # Replace the whole category, as a list or a dict, and write it out right away
+        with self._settings._write_lock:
+            self._settings.data["integrations"] = data
+        self._settings.save_data(self._settings.data)
+
+        # Keep the written data and notify callbacks
         self.data = self.load_data()
         for cb in self._callbacks:
             try:
@@ -215,7 +327,7 @@ class IntegrationsHandler():
                 continue
 
     def get(self, key: str, default=None) -> Optional[Dict[str, str]]:
-        result = next((item for item in self.data if item["key"] == key), None)
+        result = self._index.get(key)
         if result:
             return result if type(result) is dict else None
         return default
@@ -223,6 +335,6 @@ class IntegrationsHandler():
 
 settings = SettingsHandler()
 user = UserDataHandler()
-integrations = IntegrationsHandler()
+integrations = IntegrationsHandler(settings)
 
 
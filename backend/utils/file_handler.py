@@ -1,8 +1,13 @@
 from typing import List, Tuple
+from functools import cached_property, lru_cache, partial
+import asyncio
+import concurrent.futures
 import mimetypes
-import time
 import re
 import base64
+import os
+import stat
+from operator import attrgetter
 from urllib.parse import urlparse
 from pathlib import Path
 
@@ -13,6 +18,13 @@ from agno.media import Audio, Image, Video, File
 from agno.utils.log import logger
 from event_handler import send_event
 
+# pybase64 ships SIMD decoders and is much faster on large payloads; fall back to stdlib
+try:
+    import pybase64
+    _b64decode = pybase64.b64decode
+except ImportError:
+    _b64decode = base64.b64decode
+
 class UnsupportedFileTypeError(Exception):
     def __init__(self, message: str):
         super().__init__(message)
@@ -61,57 +73,78 @@ MEDIA_KIND_DOCUMENT = "document"
 # Constants
 MAX_INLINE_SIZE = 20 * 1024 * 1024  # 20 MB in bytes total budget
 INLINE_SAFETY_BUFFER = 256 * 1024    # 256 KB buffer to avoid edge overflow
+UPLOAD_POLL_INITIAL_DELAY = 0.25     # seconds before the first upload state check
+UPLOAD_POLL_MAX_DELAY = 4.0          # cap for the exponential polling backoff
+
+# Blocking Gemini file API calls run here, so uploads never queue behind other to_thread work.
+# Threads are only spawned on demand.
+_UPLOAD_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="gemini-upload")
+
+
+# Single MIME -> kind lookup; built in reverse precedence so earlier groups win on overlap
+_MIME_KIND = (
+    {m: MEDIA_KIND_DOCUMENT for m in DOCUMENT_MIME_TYPES}
+    | {m: MEDIA_KIND_VIDEO for m in VIDEO_MIME_TYPES}
+    | {m: MEDIA_KIND_AUDIO for m in AUDIO_MIME_TYPES}
+    | {m: MEDIA_KIND_IMAGE for m in IMAGE_MIME_TYPES}
+)
 
 
 def classify_mime(content_type: str) -> str:
-    if content_type in IMAGE_MIME_TYPES:
-        return MEDIA_KIND_IMAGE
-    if content_type in AUDIO_MIME_TYPES:
-        return MEDIA_KIND_AUDIO
-    if content_type in VIDEO_MIME_TYPES:
-        return MEDIA_KIND_VIDEO
-    if content_type in DOCUMENT_MIME_TYPES:
-        return MEDIA_KIND_DOCUMENT
-    return "unsupported"
+    return _MIME_KIND.get(content_type, "unsupported")
+
+
+@lru_cache(maxsize=256)
+def _guess_by_suffix(suffix: str) -> str:
+    """MIME type for a lowercased file suffix, cached since attachments repeat extensions."""
+    return mimetypes.guess_type("x" + suffix)[0] or "application/octet-stream"
 
 
 class FileMeta:
     def __init__(self, path: Path):
         self.path = path
-        self.size = path.stat().st_size if path.exists() else 0
-        self.content_type = mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+        # One stat call gives existence, file type and size
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.is_file = False
+            self.size = 0
+        else:
+            self.is_file = stat.S_ISREG(st.st_mode)
+            self.size = st.st_size
+        self.content_type = _guess_by_suffix(path.suffix.lower())
         self.kind = classify_mime(self.content_type)
 
 
-async def _upload_if_needed(path: Path, model, remaining_inline_budget: int) -> Tuple[str, int, bool]:
-    """Return a filepath or uploaded identifier.
+async def _upload_file(meta: FileMeta, model) -> Tuple[str, int, bool]:
+    """Upload a file that did not fit the inline budget.
     Returns (reference, size_counted_inline, used_upload)
-    If size fits remaining_inline_budget, we keep it inline (no upload) and count its size.
-    If not and model provided, attempt upload (returns logical handle, counts 0 inline).
-    If not and no model, still inline (best-effort) - may overflow.
+    On success returns the uploaded identifier and counts 0 inline.
+    If the upload fails, falls back to inline (best-effort) - may overflow.
     """
-    size = path.stat().st_size
-    if size <= remaining_inline_budget:
-        return str(path), size, False
-    if model is None:
-        # No model => cannot upload; return inline anyway (caller might warn)
-        return str(path), size, False
+    path = meta.path
     try:
         logger.info(f"Uploading (budget overflow) file: {path}")
         await send_event("Uploading file...")
-        uploaded = model.get_client().files.upload(
-            file=path,
-            config=dict(name=path.stem, display_name=path.stem),
+        client = model.get_client()
+        loop = asyncio.get_running_loop()
+        # The SDK calls are blocking HTTP requests, keep them off the event loop
+        uploaded = await loop.run_in_executor(
+            _UPLOAD_POOL,
+            partial(client.files.upload, file=path, config=dict(name=path.stem, display_name=path.stem)),
         )
+        # Poll with exponential backoff; small files are usually ready on the first check
+        delay = UPLOAD_POLL_INITIAL_DELAY
         while uploaded.state.name == "PROCESSING":
-            time.sleep(2)
-            uploaded = model.get_client().files.get(name=uploaded.name)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, UPLOAD_POLL_MAX_DELAY)
+            uploaded = await loop.run_in_executor(_UPLOAD_POOL, partial(client.files.get, name=uploaded.name))
         logger.info(f"Uploaded file: {uploaded}")
         await send_event("File uploaded")
         return uploaded.name, 0, True
     except Exception as e:
         logger.error(f"Upload failed for {path}: {e}; using inline fallback")
-        return str(path), size, False
+        return str(path), meta.size, False
 
 
 def _make_media(meta: FileMeta, ref: str):
@@ -126,17 +159,23 @@ def _make_media(meta: FileMeta, ref: str):
     raise UnsupportedFileTypeError(f"Unsupported file type: {meta.content_type}")
 
 
+# URL path extension -> media kind (basic heuristic)
+_URL_EXT_KIND = (
+    {ext: MEDIA_KIND_IMAGE for ext in (".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tiff")}
+    | {ext: MEDIA_KIND_AUDIO for ext in (".mp3", ".wav", ".ogg", ".flac", ".aac")}
+    | {ext: MEDIA_KIND_VIDEO for ext in (".mp4", ".webm", ".mov", ".avi", ".mkv")}
+)
+
+
+@lru_cache(maxsize=512)
 def _infer_url_kind(url: str) -> str:
+    # Cached per URL since the same links come back on retries; media objects are
+    # built fresh by callers because agents may mutate them
     parsed = urlparse(url)
     host = (parsed.netloc or '').lower()
-    path = parsed.path.lower()
-    # Basic heuristic for image extensions
-    if any(path.endswith(ext) for ext in [".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tiff"]):
-        return MEDIA_KIND_IMAGE
-    if any(path.endswith(ext) for ext in [".mp3", ".wav", ".ogg", ".flac", ".aac"]):
-        return MEDIA_KIND_AUDIO
-    if any(path.endswith(ext) for ext in [".mp4", ".webm", ".mov", ".avi", ".mkv"]):
-        return MEDIA_KIND_VIDEO
+    kind = _URL_EXT_KIND.get(os.path.splitext(parsed.path)[1].lower())
+    if kind is not None:
+        return kind
     if host in YOUTUBE_HOSTS:
         return MEDIA_KIND_VIDEO
     # Default treat as document/file
@@ -145,24 +184,37 @@ def _infer_url_kind(url: str) -> str:
 
 URL_REGEX = re.compile(r"https?://[^\s]+", re.IGNORECASE)
 DATA_URL_REGEX = re.compile(r"data:([^;]+);base64,([A-Za-z0-9+/]+=*)", re.IGNORECASE)
+# Data URLs and regular URLs combined, so text can be scanned once
+MEDIA_URL_REGEX = re.compile(
+    r"data:(?P<mime>[^;]+);base64,(?P<b64>[A-Za-z0-9+/]+=*)|(?P<url>https?://[^\s]+)",
+    re.IGNORECASE,
+)
 YOUTUBE_HOSTS = {"youtube.com", "www.youtube.com", "youtu.be", "m.youtube.com"}
 
+_MEDIA_CLASSES = {
+    MEDIA_KIND_IMAGE: Image,
+    MEDIA_KIND_AUDIO: Audio,
+    MEDIA_KIND_VIDEO: Video,
+    MEDIA_KIND_DOCUMENT: File,
+}
+
+
+def _match_data_url(data_url: str) -> "DataUrlMeta":
+    """Match a single data URL without decoding its payload."""
+    match = DATA_URL_REGEX.match(data_url.strip())
+    if not match:
+        raise ValueError(f"Invalid data URL format: {data_url[:50]}...")
+    return DataUrlMeta(match.group(1), match.group(2))
+
 
 def parse_data_url(data_url: str) -> Tuple[str, bytes]:
     """
     Parse a data URL and return (mime_type, decoded_data).
-    Returns None if the data URL is invalid.
+    Raises ValueError if the data URL is invalid.
     """
-    match = DATA_URL_REGEX.match(data_url.strip())
-    if not match:
-        raise ValueError(f"Invalid data URL format: {data_url[:50]}...")
-    
-    mime_type = match.group(1)
-    base64_data = match.group(2)
-    
+    meta = _match_data_url(data_url)
     try:
-        decoded_data = base64.b64decode(base64_data)
-        return mime_type, decoded_data
+        return meta.mime_type, meta.content
     except Exception as e:
         raise ValueError(f"Failed to decode base64 data: {e}")
 
@@ -175,86 +227,123 @@ def classify_data_url_mime(mime_type: str) -> str:
 def create_media_from_data_url(data_url: str):
     """Create appropriate media object from a data URL."""
     try:
-        mime_type, decoded_data = parse_data_url(data_url)
-        media_kind = classify_data_url_mime(mime_type)
-        
-        if media_kind == MEDIA_KIND_IMAGE:
-            return Image(content=decoded_data, mime_type=mime_type)
-        elif media_kind == MEDIA_KIND_AUDIO:
-            return Audio(content=decoded_data, mime_type=mime_type)
-        elif media_kind == MEDIA_KIND_VIDEO:
-            return Video(content=decoded_data, mime_type=mime_type)
-        elif media_kind == MEDIA_KIND_DOCUMENT:
-            return File(content=decoded_data, mime_type=mime_type)
-        else:
-            raise UnsupportedFileTypeError(f"Unsupported data URL MIME type: {mime_type}")
+        # Classified before decoding; the payload is decoded once, straight into the media object
+        return _match_data_url(data_url).to_media()
     except Exception as e:
         logger.error(f"Failed to process data URL: {e}")
         raise UnsupportedFileTypeError(f"Invalid data URL: {e}")
 
 
+class DataUrlMeta:
+    """A data URL found in text. The base64 payload is only decoded when content is accessed."""
+
+    def __init__(self, mime_type: str, base64_data: str):
+        self.mime_type = mime_type
+        self.base64_data = base64_data
+        self.kind = classify_data_url_mime(mime_type)
+
+    @property
+    def has_valid_length(self) -> bool:
+        # The regex fixes the alphabet, so a length that isn't a multiple of 4 is the usual way decoding fails
+        return not len(self.base64_data) & 3
+
+    @cached_property
+    def content(self) -> bytes:
+        return _b64decode(self.base64_data, validate=False)
+
+    def to_media(self):
+        media_cls = _MEDIA_CLASSES.get(self.kind)
+        if media_cls is None:
+            raise UnsupportedFileTypeError(f"Unsupported data URL MIME type: {self.mime_type}")
+        return media_cls(content=self.content, mime_type=self.mime_type)
+
+
+def iter_data_urls(text: str):
+    """Yield a DataUrlMeta per data URL in text, one match at a time."""
+    for match in DATA_URL_REGEX.finditer(text or ""):
+        yield DataUrlMeta(match.group(1), match.group(2))
+
+
 def extract_data_urls_from_text(text: str):
     """Extract data URLs from text and return categorized media objects."""
-    data_urls = DATA_URL_REGEX.findall(text or "")
+    if not text:
+        return [], [], [], []
+
     images: List[Image] = []
     audios: List[Audio] = []
     videos: List[Video] = []
     documents: List[File] = []
     
-    # Reconstruct full data URLs and process them
-    for mime_type, base64_data in data_urls:
+    # Classify before decoding so unsupported payloads are never decoded
+    for meta in iter_data_urls(text):
+        if meta.kind == "unsupported":
+            continue
+        if not meta.has_valid_length:
+            logger.warning(f"Skipping truncated data URL with MIME type {meta.mime_type}")
+            continue
         try:
-            decoded_data = base64.b64decode(base64_data)
-            media_kind = classify_data_url_mime(mime_type)
-            if media_kind == MEDIA_KIND_IMAGE:
-                images.append(Image(content=decoded_data, mime_type=mime_type))
-            elif media_kind == MEDIA_KIND_AUDIO:
-                audios.append(Audio(content=decoded_data, mime_type=mime_type))
-            elif media_kind == MEDIA_KIND_VIDEO:
-                videos.append(Video(content=decoded_data, mime_type=mime_type))
-            elif media_kind == MEDIA_KIND_DOCUMENT:
-                documents.append(File(content=decoded_data, mime_type=mime_type))
+            media_obj = meta.to_media()
         except Exception as e:
-            logger.warning(f"Skipping invalid data URL with MIME type {mime_type}: {e}")
+            logger.warning(f"Skipping invalid data URL with MIME type {meta.mime_type}: {e}")
             continue
+        if meta.kind == MEDIA_KIND_IMAGE:
+            images.append(media_obj)
+        elif meta.kind == MEDIA_KIND_AUDIO:
+            audios.append(media_obj)
+        elif meta.kind == MEDIA_KIND_VIDEO:
+            videos.append(media_obj)
+        elif meta.kind == MEDIA_KIND_DOCUMENT:
+            documents.append(media_obj)
     
     return images, audios, videos, documents
 
 
 def extract_media_from_text(text: str):
     """Extract both regular URLs and data URLs from text and return categorized media objects."""
-    # Extract regular URLs
-    urls = URL_REGEX.findall(text or "")
+    # Most chat turns contain no links at all; bail out before building any state
+    first = MEDIA_URL_REGEX.search(text) if text else None
+    if first is None:
+        return [], [], [], []
+
     images: List[Image] = []
     audios: List[Audio] = []
     videos: List[Video] = []
     documents: List[File] = []
+    by_kind = {
+        MEDIA_KIND_IMAGE: images,
+        MEDIA_KIND_AUDIO: audios,
+        MEDIA_KIND_VIDEO: videos,
+        MEDIA_KIND_DOCUMENT: documents,
+    }
+    # Data URL media is appended after all regular URLs, as before
+    data_media = []
     seen = set()
-    
-    # Process regular URLs
-    for u in urls:
-        if u in seen:
+
+    # Single pass over the text for both regular URLs and data URLs
+    for match in MEDIA_URL_REGEX.finditer(text, first.start()):
+        u = match.group("url")
+        if u is not None:
+            if u in seen:
+                continue
+            seen.add(u)
+            kind = _infer_url_kind(u)
+            by_kind[kind].append(_MEDIA_CLASSES[kind](url=u))
             continue
-        seen.add(u)
-        kind = _infer_url_kind(u)
-        if kind == MEDIA_KIND_IMAGE:
-            images.append(Image(url=u))
-        elif kind == MEDIA_KIND_AUDIO:
-            audios.append(Audio(url=u))
-        elif kind == MEDIA_KIND_VIDEO:
-            videos.append(Video(url=u))
-        elif kind == MEDIA_KIND_DOCUMENT:
-            documents.append(File(url=u))
-    
-    # Extract and process data URLs
-    data_images, data_audios, data_videos, data_documents = extract_data_urls_from_text(text)
-    
-    # Combine results
-    images.extend(data_images)
-    audios.extend(data_audios)
-    videos.extend(data_videos)
-    documents.extend(data_documents)
-    
+
+        meta = DataUrlMeta(match.group("mime"), match.group("b64"))
+        if meta.kind == "unsupported":
+            continue
+        if not meta.has_valid_length:
+            logger.warning(f"Skipping truncated data URL with MIME type {meta.mime_type}")
+            continue
+        try:
+            data_media.append((meta.kind, meta.to_media()))
+        except Exception as e:
+            logger.warning(f"Skipping invalid data URL with MIME type {meta.mime_type}: {e}")
+
+    for kind, media_obj in data_media:
+        by_kind[kind].append(media_obj)
+
     return images, audios, videos, documents
 
 
@@ -269,15 +358,15 @@ async def process_file(
     for fp in filepaths:
         if isinstance(fp, str):
             fp = Path(fp)
-        if not fp.exists() or not fp.is_file():
-            raise HTTPException(status_code=400, detail=f"File not found: {fp}")
         meta = FileMeta(fp)
+        if not meta.is_file:
+            raise HTTPException(status_code=400, detail=f"File not found: {fp}")
         if meta.kind == "unsupported":
             raise UnsupportedFileTypeError(f"Unsupported file type: {meta.content_type}")
         metas.append(meta)
 
     # Sort by size ascending so smaller files preferentially stay inline
-    metas.sort(key=lambda m: m.size)
+    metas.sort(key=attrgetter("size"))
 
     inline_budget = MAX_INLINE_SIZE - INLINE_SAFETY_BUFFER
     used_inline = 0
@@ -287,9 +376,24 @@ async def process_file(
     videos: List[Video] = []
     documents: List[File] = []
 
-    for meta in metas:
-        ref, counted, uploaded = await _upload_if_needed(meta.path, agent, inline_budget - used_inline)
-        used_inline += counted
+    # Decide inline vs upload up front so the budget does not depend on upload timing.
+    # Without a model nothing can be uploaded, so everything stays inline (may overflow).
+    refs: List[Tuple[str, int, bool]] = [None] * len(metas)  # type: ignore[list-item]
+    to_upload: List[int] = []
+    for i, meta in enumerate(metas):
+        if meta.size <= inline_budget - used_inline or agent is None:
+            refs[i] = (str(meta.path), meta.size, False)
+            used_inline += meta.size
+        else:
+            to_upload.append(i)
+
+    # Overflowing files are uploaded concurrently
+    results = await asyncio.gather(*(_upload_file(metas[i], agent) for i in to_upload))
+    for i, result in zip(to_upload, results):
+        refs[i] = result
+        used_inline += result[1]
+
+    for meta, (ref, counted, uploaded) in zip(metas, refs):
         media_obj = _make_media(meta, ref)
         if meta.kind == MEDIA_KIND_IMAGE:
             images.append(media_obj)  # type: ignore[arg-type]
@@ -300,8 +404,8 @@ async def process_file(
         elif meta.kind == MEDIA_KIND_DOCUMENT:
             documents.append(media_obj)  # type: ignore[arg-type]
         logger.info(
-            f"Prepared {meta.kind} {meta.path.name} | size={meta.size} | inline_counted={counted>0} | "
-            f"uploaded={uploaded} | total_inline_used={used_inline}/{inline_budget}"
+            "Prepared %s %s | size=%d | inline_counted=%s | uploaded=%s | total_inline_used=%d/%d",
+            meta.kind, meta.path.name, meta.size, counted > 0, uploaded, used_inline, inline_budget,
         )
 
     await send_event("Responding...")
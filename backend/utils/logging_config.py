@@ -1,9 +1,15 @@
-
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
 import sys
 
+# Background listener that does the formatting and I/O for the 'gravia' logger
+log_listener: QueueListener | None = None
+
 def setup_logging():
+    global log_listener
+
     # Create a logger
     logger = logging.getLogger('gravia')
     logger.setLevel(logging.DEBUG)  # Set the lowest level to capture all messages
@@ -22,9 +28,14 @@ def setup_logging():
     console_handler.setLevel(logging.DEBUG)  # Log DEBUG and above to the console
     console_handler.setFormatter(formatter)
 
-    # Add the handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Callers only enqueue records; a listener thread writes them to the handlers,
+    # so disk writes and rollovers never block the audio or event-loop threads
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    log_listener.start()
+    # Flush whatever is still queued on shutdown
+    atexit.register(log_listener.stop)
 
     return logger
 
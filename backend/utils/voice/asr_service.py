@@ -1,4 +1,7 @@
 import asyncio
+import logging
+import os
+import queue
 import time
 from dataclasses import dataclass, field
 from typing import Callable, Optional, Awaitable, Any, Dict
@@ -6,6 +9,7 @@ from typing import Callable, Optional, Awaitable, Any, Dict
 from deepgram import DeepgramClient, LiveOptions, LiveTranscriptionEvents
 import numpy as np
 from config import DEEPGRAM_API_KEY
+from utils.logging_config import logger
 
 try:
     import onnxruntime as ort  # type: ignore
@@ -20,6 +24,26 @@ except ImportError:
     sd = None
 
 
+# Samples per microphone callback block
+MIC_BLOCKSIZE = 1024
+
+# int16 PCM full scale -> [-1.0, 1.0) float32
+PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+# Run VAD once per this many blocks (~128 ms at 16 kHz); the inactivity check is per second anyway
+VAD_EVERY = 2
+
+# Silero VAD model files; an int8 quantized copy is preferred when present
+VAD_MODEL_PATH = "silero_vad.onnx"
+VAD_MODEL_INT8_PATH = "silero_vad.int8.onnx"
+# Faster providers to try before the default CPU one, if this onnxruntime build has them
+VAD_PREFERRED_PROVIDERS = ("DnnlExecutionProvider", "OpenVINOExecutionProvider")
+
+# Per-chunk VAD traces fire ~15 times a second; opt in by setting this logger to DEBUG
+vad_logger = logger.getChild("vad")
+vad_logger.setLevel(logging.INFO)
+
+
 @dataclass
 class TranscriptionEvent:
     type: str  # 'partial' | 'final' | 'error' | 'status'
@@ -48,7 +72,7 @@ class MicrophoneStream:
             return
         self._stream = sd.RawInputStream(
             samplerate=self._sample_rate,
-            blocksize=1024,
+            blocksize=MIC_BLOCKSIZE,
             dtype="int16",
             channels=1,
             callback=self._callback,
@@ -86,8 +110,16 @@ class ASRSession:
         self._final_buffer: list[str] = []
         self._vad_session = vad_session
         self._vad_threshold = vad_threshold
+        # Reused VAD input buffers holding VAD_EVERY blocks; resized only if the block size changes
+        self._vad_buf = np.empty((1, MIC_BLOCKSIZE * VAD_EVERY), dtype=np.float32)
+        self._vad_tick = 0
+        self._sr_arr = np.array([sample_rate], dtype=np.int64)
         self._mic_stream: MicrophoneStream | None = None
         self._loop = None  # Store the event loop
+        # Events from Deepgram's callback thread, drained in order by one task on the loop
+        self._ev_queue: queue.SimpleQueue[TranscriptionEvent] = queue.SimpleQueue()
+        self._drain_scheduled = False
+        self._drain_task: Optional[asyncio.Task] = None
 
         self._connection.on(LiveTranscriptionEvents.Open, self._on_open)
         self._connection.on(LiveTranscriptionEvents.Transcript, self._on_transcript)
@@ -147,19 +179,35 @@ class ASRSession:
         # Optional local VAD (Silero) to refine inactivity timeout
         if self._vad_session and not self._closed and len(pcm16) >= 320:  # ~10ms
             try:
-                audio = np.frombuffer(pcm16, dtype=np.int16).astype("float32") / 32768.0
-                # Log the audio characteristics
-                is_silent = np.all(audio == 0)
-                max_abs_val = np.max(np.abs(audio))
-                print(f"[VAD] Audio received - Silent: {is_silent}, Max abs value: {max_abs_val:.4f}")
-
-                audio = audio.reshape(1, -1)
-                sr_arr = np.array([self._sample_rate], dtype=np.int64)
-                # The Silero ONNX model exported commonly uses input names 'input' and 'sr'
-                ort_inputs = {"input": audio, "sr": sr_arr}
-                prob = self._vad_session.run(None, ort_inputs)[0].squeeze()
-                if float(prob) > self._vad_threshold:
-                    self._last_speech_time = time.time()
+                samples = len(pcm16) // 2
+                if self._vad_buf.shape[1] != samples * VAD_EVERY:
+                    self._vad_buf = np.empty((1, samples * VAD_EVERY), dtype=np.float32)
+                    self._vad_tick = 0
+                audio = self._vad_buf
+                # Collect VAD_EVERY blocks and run the model once over all of them.
+                # Cast and scale in one pass, straight into the buffer slot.
+                start = self._vad_tick * samples
+                np.multiply(
+                    np.frombuffer(pcm16, dtype=np.int16, count=samples),
+                    PCM16_SCALE,
+                    out=audio[0, start:start + samples],
+                    dtype=np.float32,
+                )
+                self._vad_tick += 1
+                if self._vad_tick == VAD_EVERY:
+                    self._vad_tick = 0
+                    # Log the audio characteristics; the reductions are skipped unless debugging
+                    if vad_logger.isEnabledFor(logging.DEBUG):
+                        vad_logger.debug(
+                            "[VAD] Audio received - Silent: %s, Max abs value: %.4f",
+                            not audio.any(), np.abs(audio).max(),
+                        )
+
+                    # The Silero ONNX model exported commonly uses input names 'input' and 'sr'
+                    ort_inputs = {"input": audio, "sr": self._sr_arr}
+                    prob = self._vad_session.run(None, ort_inputs)[0].squeeze()
+                    if float(prob) > self._vad_threshold:
+                        self._last_speech_time = time.time()
             except Exception:  # pragma: no cover - best effort VAD
                 pass
         if not self._closed:
@@ -191,13 +239,37 @@ class ASRSession:
         try:
             loop = self._loop or asyncio.get_event_loop()
             if loop.is_running():
-                asyncio.run_coroutine_threadsafe(self._on_event(event), loop)
+                self._ev_queue.put_nowait(event)
+                # Wake the loop once per burst rather than once per event
+                if not self._drain_scheduled:
+                    self._drain_scheduled = True
+                    loop.call_soon_threadsafe(self._start_drain)
             else:
                 # fallback: just call directly (should not happen in prod)
                 asyncio.create_task(self._on_event(event))
         except Exception as e:
             print(f"[ASRSession] Failed to dispatch event: {e}")
 
+    def _start_drain(self):
+        # Runs on the loop; a single drain task keeps events in order
+        self._drain_scheduled = False
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain_events())
+
+    async def _drain_events(self):
+        try:
+            while True:
+                try:
+                    event = self._ev_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    await self._on_event(event)
+                except Exception as e:
+                    print(f"[ASRSession] Event handler failed: {e}")
+        finally:
+            self._drain_task = None
+
     def _on_transcript(self, _self, result, **_):
         try:
             alt = result.channel.alternatives[0]
@@ -237,10 +309,26 @@ class ASRManager:
         if silero_available:
             # Lazy load ONNX model; ignore failures
             try:
-                self._vad_session = ort.InferenceSession("silero_vad.onnx", providers=["CPUExecutionProvider"])  # type: ignore
+                self._vad_session = self._create_vad_session()
             except Exception:  # pragma: no cover
                 self._vad_session = None
 
+    @staticmethod
+    def _create_vad_session():
+        # The model is tiny, so a single sequential thread beats intra-op threading overhead
+        options = ort.SessionOptions()  # type: ignore
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL  # type: ignore
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL  # type: ignore
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+
+        available = ort.get_available_providers()  # type: ignore
+        providers = [p for p in VAD_PREFERRED_PROVIDERS if p in available]
+        providers.append("CPUExecutionProvider")
+
+        model_path = VAD_MODEL_INT8_PATH if os.path.exists(VAD_MODEL_INT8_PATH) else VAD_MODEL_PATH
+        return ort.InferenceSession(model_path, sess_options=options, providers=providers)  # type: ignore
+
     async def start_session(
         self,
         session_key: str,
@@ -1,34 +1,199 @@
 import asyncio
 import edge_tts
+import numpy as np
 from fastapi import WebSocket
 import pyaudio
-import io
+import shutil
+import subprocess
 import threading
-import time
-from queue import Queue
-from pydub import AudioSegment
+import weakref
+from collections import OrderedDict, deque
 from utils.data_handler import settings
+from utils.voice.tts_text_norm import normalize_math
 from typing import Optional, Tuple
 import re
 import html
+import json
+
+# Text cleaning patterns, compiled once at import
+_RE_HTML_TAG = re.compile(r"<[^>]+>")
+_RE_BLOCKQUOTE = re.compile(r"(?m)^\s*>+\s?")
+_RE_LIST_BULLET = re.compile(r"(?m)^\s*[-+*]\s+")
+_RE_BOLD_CODE = re.compile(r"\*\*|__|`+")
+_RE_HEADING = re.compile(r"(?m)^\s*#{1,6}\s*")
+_RE_MD_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_RE_MD_LINK = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+_BULLET_CHARS = frozenset("-+*")
+# Numeric ranges (2024-2025) and emojis (common ranges, group 1) after math normalization
+_RE_RANGE_OR_EMOJI = re.compile(
+    r"(?<=\d)\s*-\s*(?=\d)"
+    "|([\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "]+)",
+)
+_RE_WHITESPACE = re.compile(r"\s+")
+_RE_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+# ASCII characters that can start an entity, markup, math or a range; plain ASCII text
+# without any of them only needs its whitespace collapsed (emojis/superscripts are non-ASCII)
+_CLEAN_TRIGGERS = frozenset("&<>*_`[#$\\^/-+")
+
+# Client status messages never change, so they are serialized once, compact and
+# unescaped like Starlette's send_json
+_MSG_TTS_START = json.dumps({"type": "tts_start", "message": "TTS streaming started."}, separators=(",", ":"), ensure_ascii=False)
+_MSG_TTS_COMPLETE = json.dumps({"type": "tts_complete", "message": "TTS streaming completed."}, separators=(",", ":"), ensure_ascii=False)
+_MSG_TTS_START_FALLBACK = json.dumps({"type": "tts_start", "message": "TTS streaming started (fallback)."}, separators=(",", ":"), ensure_ascii=False)
+_MSG_TTS_COMPLETE_FALLBACK = json.dumps({"type": "tts_complete", "message": "TTS streaming completed (fallback)."}, separators=(",", ":"), ensure_ascii=False)
+
+
+def _range_or_emoji_repl(m: re.Match) -> str:
+    return "" if m.group(1) else " to "
+
+
+def _split_sentences(text: str, max_chars: int) -> list[str]:
+    """Group whole sentences into pieces of at most max_chars; a longer sentence stays whole."""
+    if len(text) <= max_chars:
+        return [text]
+    pieces = []
+    current = ""
+    for sentence in _RE_SENTENCE_END.split(text):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    pieces.append(current)
+    return pieces
+
+
+def _leading_silence_samples(pcm: bytes | bytearray, max_samples: int, threshold: int) -> int:
+    """Number of leading int16 samples (up to max_samples) whose magnitude stays within threshold."""
+    samples = np.frombuffer(pcm, dtype=np.int16, count=min(len(pcm) // 2, max_samples))
+    # Compare both signs instead of abs(), which overflows for -32768
+    loud = (samples > threshold) | (samples < -threshold)
+    first = int(loud.argmax()) if loud.size else 0
+    return first if loud.size and loud[first] else len(samples)
+
+
+def _ffmpeg_pcm_cmd(ffmpeg_path: str, channels: int, rate: int) -> list[str]:
+    """ffmpeg arguments decoding MP3 on stdin to s16le PCM on stdout."""
+    return [
+        ffmpeg_path,
+        "-loglevel", "error",
+        "-f", "mp3",
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "-ac", str(channels),
+        "-ar", str(rate),
+        "pipe:1",
+    ]
+
+
+class _Mp3Prefetch:
+    """edge-tts MP3 for one utterance, downloaded in the background.
+
+    Started when text is queued, so the next utterance is usually already
+    arriving while the current one plays. Iterate once to get the MP3 parts.
+    """
+
+    def __init__(self, text: str, voice: str, limit: asyncio.Semaphore):
+        self.text = text
+        self.voice = voice
+        self._parts: asyncio.Queue[Optional[bytes]] = asyncio.Queue()
+        self.started = False  # the request went out; text can no longer change
+        self.complete = False  # every part was downloaded
+        self.task = asyncio.create_task(self._fetch(limit))
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.text, self.voice
+
+    def extend(self, text: str, max_chars: int) -> bool:
+        """Append text while still waiting for a download slot.
+
+        False once the request is out or if the result would exceed max_chars.
+        """
+        if self.started or self.task.done() or len(self.text) + 1 + len(text) > max_chars:
+            return False
+        self.text = f"{self.text} {text}"
+        return True
+
+    async def _fetch(self, limit: asyncio.Semaphore):
+        try:
+            # Queued utterances take turns for a download slot in FIFO order
+            async with limit:
+                self.started = True
+                async for part in edge_tts.Communicate(self.text, self.voice).stream():
+                    if part.get("type") == "audio" and part.get("data"):
+                        self._parts.put_nowait(part["data"])
+            self.complete = True
+        except Exception as e:
+            print(f"[TTS] synthesis error: {e}")
+        finally:
+            self._parts.put_nowait(None)
+
+    async def __aiter__(self):
+        while (data := await self._parts.get()) is not None:
+            yield data
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class _PcmCache:
+    """LRU of decoded PCM for short utterances, which repeat often ("Done.", "Sure!")."""
+
+    def __init__(self, max_items: int = 128, max_text_chars: int = 48):
+        self._items: OrderedDict[Tuple[str, str], bytes] = OrderedDict()
+        self.max_items = max_items
+        self.max_text_chars = max_text_chars
+
+    def accepts(self, key: Tuple[str, str]) -> bool:
+        return len(key[0]) <= self.max_text_chars
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        pcm = self._items.get(key)
+        if pcm is not None:
+            self._items.move_to_end(key)
+        return pcm
+
+    def put(self, key: Tuple[str, str], pcm: bytes):
+        self._items[key] = pcm
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
 
 class PyAudioStreamer:
-    """Low-level PCM playback helper for continuous raw PCM streaming."""
+    """Low-level PCM playback helper for continuous raw PCM streaming.
+
+    Chunks must already be decoded s16le PCM in the target format.
+    """
 
     def __init__(self, rate: int = 24000, channels: int = 1, sample_width: int = 2):
-        self.audio = pyaudio.PyAudio()
-        self.audio_queue: Queue[Optional[bytes]] = Queue()
+        # PortAudio init enumerates devices and can be slow, so it waits for the first stream
+        self.audio: Optional[pyaudio.PyAudio] = None
+        # Pending PCM chunks (any bytes-like object); None asks the playback worker to exit
+        self.audio_queue: deque[Optional[bytes | memoryview]] = deque()
+        self._queue_cond = threading.Condition()
+        self._worker_busy = False  # worker holds a chunk it has not finished playing
+        self._discard_buffered = False  # set by abort(): worker drops its partial chunk_buffer
         self.stream = None
         self.target_rate = rate
         self.target_channels = channels
         self.target_sample_width = sample_width
         self.frame_size = self.target_channels * self.target_sample_width
-        self.chunk_buffer = b""
+        # Unplayed PCM starts at _buf_pos; consumed bytes are dropped in bulk, not per write
+        self.chunk_buffer = bytearray()
+        self._buf_pos = 0
         # PCM write granularity (moderate size to balance latency vs overhead)
         self.fixed_chunk_size = 3072
+        # Whole frames per write, so the playback loop never needs to pad
+        assert self.fixed_chunk_size % self.frame_size == 0, "chunk size must be a whole number of frames"
         self._playback_thread: Optional[threading.Thread] = None
         self._started = False
-        self.is_raw_pcm = False
         # Backpressure config
         self.max_queue_chunks = 80
         # Status tracking
@@ -37,6 +202,8 @@ class PyAudioStreamer:
 
     def _ensure_stream(self):
         if self.stream is None:
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
             self.stream = self.audio.open(
                 format=self.audio.get_format_from_width(self.target_sample_width),
                 channels=self.target_channels,
@@ -45,11 +212,37 @@ class PyAudioStreamer:
                 frames_per_buffer=2048,
             )
 
+    def _put(self, data: Optional[bytes | memoryview]):
+        with self._queue_cond:
+            self.audio_queue.append(data)
+            self._queue_cond.notify_all()
+
+    def _next_chunk(self) -> Optional[bytes | memoryview]:
+        """Mark the previous chunk as played and wait for the next one, in one lock round-trip."""
+        with self._queue_cond:
+            self._worker_busy = False
+            if not self.audio_queue:
+                self._queue_cond.notify_all()  # wake drain()
+                while not self.audio_queue:
+                    self._queue_cond.wait()
+            self._worker_busy = True
+            if self._discard_buffered:
+                # Leftover PCM from an aborted utterance must not prefix the next one
+                self._discard_buffered = False
+                self.chunk_buffer.clear()
+                self._buf_pos = 0
+            chunk = self.audio_queue.popleft()
+            if len(self.audio_queue) == self.max_queue_chunks:
+                self._queue_cond.notify_all()  # back under the limit: wake add_chunk()
+            return chunk
+
     def _play_audio_worker(self):
         while True:
-            chunk_data = self.audio_queue.get()
+            chunk_data = self._next_chunk()
             if chunk_data is None:
-                self.audio_queue.task_done()
+                with self._queue_cond:
+                    self._worker_busy = False
+                    self._queue_cond.notify_all()
                 self.is_playing = False
                 if self.tts_manager:
                     self.tts_manager.is_playing = False
@@ -60,33 +253,30 @@ class PyAudioStreamer:
                     if self.tts_manager:
                         self.tts_manager.is_playing = True
                 
-                raw_data = chunk_data if self.is_raw_pcm else self._decode_mp3(chunk_data)
-                self.chunk_buffer += raw_data
-                while len(self.chunk_buffer) >= self.fixed_chunk_size:
-                    to_write = self.chunk_buffer[: self.fixed_chunk_size]
-                    self.chunk_buffer = self.chunk_buffer[self.fixed_chunk_size:]
-                    if len(to_write) % self.frame_size:
-                        pad = self.frame_size - (len(to_write) % self.frame_size)
-                        to_write += b"\x00" * pad
-                    if self.stream:
-                        self.stream.write(to_write)
+                self.chunk_buffer.extend(chunk_data)
+                size = self.fixed_chunk_size
+                ready = (len(self.chunk_buffer) - self._buf_pos) // size * size
+                if ready:
+                    # Every whole chunk goes out in one write: PortAudio blocks with the GIL
+                    # released for the whole span instead of returning to Python per chunk.
+                    # The zero-copy slice is released right after so the buffer can be resized.
+                    with memoryview(self.chunk_buffer) as view, view[self._buf_pos:self._buf_pos + ready] as to_write:
+                        self._buf_pos += ready
+                        if self.stream:
+                            self.stream.write(to_write)
+                # Compact once enough played bytes have piled up in front
+                if self._buf_pos >= 65536 or self._buf_pos == len(self.chunk_buffer):
+                    del self.chunk_buffer[:self._buf_pos]
+                    self._buf_pos = 0
             except Exception as e:
                 print(f"[TTS] Playback error: {e}")
             finally:
-                self.audio_queue.task_done()
                 # Check if queue is empty after processing this chunk
-                if self.audio_queue.empty():
+                if not self.audio_queue:
                     self.is_playing = False
                     if self.tts_manager:
                         self.tts_manager.is_playing = False
 
-    def _decode_mp3(self, data: bytes) -> bytes:
-        seg = AudioSegment.from_mp3(io.BytesIO(data))
-        seg = seg.set_frame_rate(self.target_rate)
-        seg = seg.set_channels(self.target_channels)
-        seg = seg.set_sample_width(self.target_sample_width)
-        return seg.raw_data
-
     def start(self):
         if self._started:
             return
@@ -95,29 +285,55 @@ class PyAudioStreamer:
         self._playback_thread.start()
         self._started = True
 
-    def add_chunk(self, data: bytes):
+    def has_room(self) -> bool:
+        """Whether add_chunk() would return without waiting for the worker."""
+        return len(self.audio_queue) <= self.max_queue_chunks
+
+    def add_chunk(self, data: bytes | memoryview):
         self.start()
-        while self.audio_queue.qsize() > self.max_queue_chunks:
-            time.sleep(0.002)
-        self.audio_queue.put(data)
+        with self._queue_cond:
+            # Backpressure: sleep until the worker takes a chunk instead of polling
+            while len(self.audio_queue) > self.max_queue_chunks:
+                self._queue_cond.wait()
+            self.audio_queue.append(data)
+            self._queue_cond.notify_all()
 
     def drain(self):
-        self.audio_queue.join()
+        """Block until every queued chunk has been played."""
+        with self._queue_cond:
+            while self.audio_queue or self._worker_busy:
+                self._queue_cond.wait()
+
+    def abort(self):
+        """Drop all pending audio without blocking.
 
-    def stop(self):
+        Only the write already inside PortAudio finishes. The stream and the
+        playback worker stay up for the next utterance.
+        """
+        with self._queue_cond:
+            self.audio_queue.clear()
+            self._discard_buffered = True
+            self._queue_cond.notify_all()  # wake drain()
+        self.is_playing = False
+
+    def shutdown(self):
+        """Play out queued audio, then stop the worker and release PortAudio (app exit)."""
         try:
-            if self.chunk_buffer and self.stream:
-                if len(self.chunk_buffer) % self.frame_size:
-                    pad = self.frame_size - (len(self.chunk_buffer) % self.frame_size)
-                    self.chunk_buffer += b"\x00" * pad
+            if self._started:
+                self._put(None)
+                self.drain()
+            # The worker has exited, so its buffer can be flushed from this thread
+            remaining = bytes(self.chunk_buffer[self._buf_pos:])
+            if remaining and self.stream and not self._discard_buffered:
+                if len(remaining) % self.frame_size:
+                    pad = self.frame_size - (len(remaining) % self.frame_size)
+                    remaining += b"\x00" * pad
                 try:
-                    self.stream.write(self.chunk_buffer)
+                    self.stream.write(remaining)
                 except Exception:
                     pass
-            self.chunk_buffer = b""
-            if self._started:
-                self.audio_queue.put(None)
-                self.audio_queue.join()
+            self.chunk_buffer = bytearray()
+            self._buf_pos = 0
         finally:
             if self.stream:
                 try:
@@ -125,25 +341,42 @@ class PyAudioStreamer:
                     self.stream.close()
                 except Exception:
                     pass
-            try:
-                self.audio.terminate()
-                self.audio = pyaudio.PyAudio()
                 self.stream = None
-            except Exception:
-                pass
+            if self.audio is not None:
+                try:
+                    self.audio.terminate()
+                except Exception:
+                    pass
+                self.audio = None
             self._started = False
 
 
 class TTSManager:
     """Serializes TTS synthesis & overlaps next synthesis (prefetch) to reduce gaps."""
 
+    # Longest a status message may hold up the ones queued behind it (seconds)
+    NOTIFY_TIMEOUT = 2.0
+
     def __init__(self):
         # Use higher internal playback rate for better quality (edge voices often 24k or 48k)
         self.streamer = PyAudioStreamer(rate=24000, channels=1, sample_width=2)
-        self.queue: asyncio.Queue[Tuple[WebSocket, str]] = asyncio.Queue()
+        # (ws, MP3 download or cached PCM)
+        self.queue: asyncio.Queue[Tuple[WebSocket, _Mp3Prefetch | bytes]] = asyncio.Queue()
+        # Most recently queued download, which later text for the same ws may join
+        self._tail: Optional[Tuple[WebSocket, _Mp3Prefetch]] = None
+        self._pcm_cache = _PcmCache()
+        # Concurrent MP3 downloads: the utterance being played and the next one
+        self._fetch_limit = asyncio.BoundedSemaphore(2)
+        self._current_audio: Optional[_Mp3Prefetch] = None
+        # Status messages for the client, sent in order by one task off the synthesis path
+        self._notify_queue: asyncio.Queue[Tuple[WebSocket, str]] = asyncio.Queue()
+        self._notify_task: Optional[asyncio.Task] = None
+        # Sockets whose last send failed or stalled; their later messages are dropped
+        self._dead_sockets: "weakref.WeakSet[WebSocket]" = weakref.WeakSet()
         self.worker_task: Optional[asyncio.Task] = None
         self.current_cancel_event = asyncio.Event()
         self.lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # captured on first use
         
         # Cache voice settings and pre-initialize
         self.cached_voice = None
@@ -154,24 +387,30 @@ class TTSManager:
         self.is_playing = False
         self.synthesis_task: Optional[asyncio.Task] = None
         
-        # Text buffering for short chunks
-        self.text_buffer = ""
+        # Text buffering for short chunks: cleaned chunks waiting to be spoken, joined with spaces on flush
+        self.text_buffer_parts: list[str] = []
+        self._buf_chars = 0  # length of the joined buffer
+        self._buf_words = 0
         self.buffer_ws: Optional[WebSocket] = None
         self.last_chunk_time = 0
         self.buffer_flush_task: Optional[asyncio.Task] = None
+
+        # A pre-spawned ffmpeg decoder for the next utterance, so spawn time stays off TTFB
+        self._spare_decoder: Optional[Tuple[list[str], asyncio.subprocess.Process]] = None
+        self._spare_decoder_task: Optional[asyncio.Task] = None
         
         # Configurable thresholds for chunk processing
         self.min_words = 3  # Minimum words before processing
         self.min_chars = 15  # Minimum characters before processing
         self.buffer_timeout = 1.5  # Seconds to wait before flushing incomplete buffer
+        self.max_chars = 200  # Longer text is split at sentence ends into separate utterances
         
-        # Pre-warm audio stream
+        # The audio stream opens in prewarm() or with the first chunk, not at import
         self.streamer.tts_manager = self
-        self.streamer.start()
 
     def get_voice(self):
         """Get cached voice or refresh if settings changed."""
-        current_time = asyncio.get_event_loop().time()
+        current_time = self._now()
         if self.cached_voice is None or (current_time - self.voice_last_update) > 30:  # Cache for 30s
             voice_setting = settings.get("voice", "en-US-JennyNeural")
             self.cached_voice = (
@@ -186,182 +425,40 @@ class TTSManager:
         """Lightweight cleaning: remove markdown/HTML/emojis and normalize math/prose for TTS."""
         if not text:
             return ""
+        # Fast path for plain prose: skip every regex but the whitespace collapse
+        if text.isascii() and _CLEAN_TRIGGERS.isdisjoint(text):
+            return _RE_WHITESPACE.sub(" ", text).strip()
         # Unescape HTML entities
         text = html.unescape(text)
+        # Each markup pass sees the output of the previous one, so the order matters;
+        # a pass is skipped when the character it needs is absent
         # Remove HTML tags
-        text = re.sub(r"<[^>]+>", "", text)
+        if '<' in text:
+            text = _RE_HTML_TAG.sub("", text)
         # Remove markdown tokens conservatively (preserve math operators)
         # - Blockquotes at start of line
-        text = re.sub(r"(?m)^\s*>+\s?", "", text)
+        if '>' in text:
+            text = _RE_BLOCKQUOTE.sub("", text)
         # - List bullets at start of line (-, +, *)
-        text = re.sub(r"(?m)^\s*[-+*]\s+", "", text)
+        if not _BULLET_CHARS.isdisjoint(text):
+            text = _RE_LIST_BULLET.sub("", text)
         # - Bold/underline/backticks; keep single '*' for math
-        text = re.sub(r"\*\*|__|`+", "", text)
+        if '*' in text or '_' in text or '`' in text:
+            text = _RE_BOLD_CODE.sub("", text)
         # - Headings at start of line
-        text = re.sub(r"(?m)^\s*#{1,6}\s*", "", text)
-        # Keep links and include URL: [text](url) -> "text (url)"
-        text = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r"\1 (\2)", text)
+        if '#' in text:
+            text = _RE_HEADING.sub("", text)
+        if '](' in text:
+            # Images are dropped entirely
+            text = _RE_MD_IMAGE.sub("", text)
+            # Keep links and include URL: [text](url) -> "text (url)"
+            text = _RE_MD_LINK.sub(r"\1 (\2)", text)
         # Normalize LaTeX/markdown math to readable phrases
-        text = self._normalize_math(text)
-        # Replace numeric ranges 2024-2025 with "to"
-        text = re.sub(r"(?<=\d)\s*-\s*(?=\d)", " to ", text)
-        # Strip emojis (common ranges)
-        emoji_pattern = re.compile(
-            "[\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map
-            "\U0001F1E0-\U0001F1FF"  # flags
-            "]+",
-            flags=re.UNICODE,
-        )
-        text = emoji_pattern.sub(r"", text)
+        text = normalize_math(text)
+        # Replace numeric ranges 2024-2025 with "to" and strip emojis
+        text = _RE_RANGE_OR_EMOJI.sub(_range_or_emoji_repl, text)
         # Collapse whitespace
-        text = re.sub(r"\s+", " ", text).strip()
-        return text
-
-    def _normalize_math(self, text: str) -> str:
-        """Convert simple math notations to TTS-friendly phrases.
-
-        Handles:
-        - Inline math delimiters: removes '$'
-        - Caret exponents: x^2, 10^8, x^{n}
-        - Standalone exponents: ^2 -> "squared", ^8 -> "raised to the power 8"
-        - Unicode superscripts: x², 10⁸, xⁿ
-        """
-        if not text:
-            return text
-
-        # Remove inline math dollar delimiters
-        if '$' in text:
-            text = text.replace('$', '')
-
-        # Handle \frac{num}{den} -> "num over den"
-        frac_pattern = re.compile(r"\\frac\s*\{([^}]+)\}\s*\{([^}]+)\}")
-        text = frac_pattern.sub(lambda m: f"{m.group(1)} over {m.group(2)}", text)
-
-        # Remove sizing wrappers like \left \right
-        text = re.sub(r"\\left\s*", "", text)
-        text = re.sub(r"\\right\s*", "", text)
-
-        # Strip LaTeX formatting wrappers but keep content, e.g., \boxed{X} -> X
-        wrapper_cmds = (
-            "boxed", "text", "operatorname", "mathrm", "mathbf", "mathit",
-            "mathbb", "mathcal", "textrm", "textbf", "textit"
-        )
-        wrapper_pattern = re.compile(r"\\(" + "|".join(map(re.escape, wrapper_cmds)) + r")\s*\{([^{}]+)\}")
-        for _ in range(3):
-            if not wrapper_pattern.search(text):
-                break
-            text = wrapper_pattern.sub(lambda m: m.group(2), text)
-
-        # Map common LaTeX greek letters and functions to plain words
-        latex_map = {
-            r"\\pi": "pi", r"\\theta": "theta", r"\\alpha": "alpha", r"\\beta": "beta",
-            r"\\gamma": "gamma", r"\\delta": "delta", r"\\lambda": "lambda", r"\\mu": "mu",
-            r"\\nu": "nu", r"\\phi": "phi", r"\\psi": "psi", r"\\omega": "omega",
-            r"\\sin": "sin", r"\\cos": "cos", r"\\tan": "tan", r"\\log": "log", r"\\ln": "ln"
-        }
-        for pat, rep in latex_map.items():
-            text = re.sub(pat, rep, text)
-
-        # Remove stray backslashes before letters (e.g., \x -> x)
-        text = re.sub(r"\\([A-Za-z])", r"\1", text)
-
-        # 1) Normalize caret forms like base^exp or base^{exp}
-        caret_pattern = re.compile(r"(?P<base>[A-Za-z0-9_.()\[\])]+)\s*\^\s*(?P<exp>\{[^}]+\}|[A-Za-z0-9]+)")
-
-        def caret_repl(m: re.Match) -> str:
-            base = m.group('base')
-            exp = m.group('exp')
-            if exp.startswith('{') and exp.endswith('}'):
-                exp = exp[1:-1].strip()
-            if exp == '2':
-                return f"{base} squared"
-            if exp == '3':
-                return f"{base} cubed"
-            return f"{base} raised to the power {exp}"
-
-        text = caret_pattern.sub(caret_repl, text)
-
-        # 2) Standalone ^exp (no explicit base)
-        standalone_caret = re.compile(r"\^\s*(\{[^}]+\}|\d+|[A-Za-z]+)")
-
-        def standalone_repl(m: re.Match) -> str:
-            exp = m.group(1)
-            if exp.startswith('{') and exp.endswith('}'):
-                exp = exp[1:-1].strip()
-            if exp == '2':
-                return " squared"
-            if exp == '3':
-                return " cubed"
-            return f" raised to the power {exp}"
-
-        text = standalone_caret.sub(standalone_repl, text)
-
-        # 3) Unicode superscripts after a base token
-        sup_map = {
-            '⁰': '0', '¹': '1', '²': '2', '³': '3', '⁴': '4',
-            '⁵': '5', '⁶': '6', '⁷': '7', '⁸': '8', '⁹': '9',
-            '⁺': '+', '⁻': '-', '⁽': '(', '⁾': ')', 'ⁿ': 'n'
-        }
-        sup_chars = ''.join(map(re.escape, sup_map.keys()))
-        superscript_pattern = re.compile(rf"(?P<base>[A-Za-z0-9_.()\[\]{{}}]+)(?P<sup>[{sup_chars}]+)")
-
-        def superscript_repl(m: re.Match) -> str:
-            base = m.group('base')
-            sup_seq = m.group('sup')
-            exp = ''.join(sup_map.get(ch, '') for ch in sup_seq)
-            if exp == '2':
-                return f"{base} squared"
-            if exp == '3':
-                return f"{base} cubed"
-            if exp:
-                return f"{base} raised to the power {exp}"
-            return base
-
-        text = superscript_pattern.sub(superscript_repl, text)
-
-        # 4) Prefer saying "by" instead of "slash" for math-like X/Y patterns
-        slash_pattern = re.compile(r"(?P<left>[A-Za-z0-9()\[\]{}]+)\s*/\s*(?P<right>[A-Za-z0-9()\[\]{}]+)")
-        math_words = {"sin","cos","tan","log","ln","pi","theta","alpha","beta","gamma","delta","lambda","phi","psi","omega","sigma","mu","nu","eta","rho","xi","zeta","k","n","m","x","y","z"}
-
-        def is_mathy(tok: str) -> bool:
-            t = tok.lower()
-            return (
-                any(ch.isdigit() for ch in t)
-                or len(t) <= 2
-                or any(c in t for c in "()[]{}")
-                or t in math_words
-            )
-
-        def slash_repl(m: re.Match) -> str:
-            left = m.group('left')
-            right = m.group('right')
-            if is_mathy(left) or is_mathy(right):
-                return f"{left} by {right}"
-            return f"{left}/{right}"
-
-        text = slash_pattern.sub(slash_repl, text)
-
-        # 5) Convert binary '-' to 'minus' in math contexts; keep prose hyphens
-        minus_pattern = re.compile(r"(?P<left>[A-Za-z0-9)\]\}]+)\s*-\s*(?P<right>[A-Za-z0-9(\[\{]+)")
-
-        def minus_repl(m: re.Match) -> str:
-            left = m.group('left')
-            right = m.group('right')
-            # keep numeric ranges as hyphen; later prose step turns to 'to'
-            if left.isdigit() and right.isdigit():
-                return f"{left}-{right}"
-            if is_mathy(left) or is_mathy(right):
-                return f"{left} minus {right}"
-            return f"{left}-{right}"
-
-        text = minus_pattern.sub(minus_repl, text)
-
-        # 6) Unary minus before number/variable -> say 'minus X'
-        unary_minus_pattern = re.compile(r"(^|[\s(=/+*^])-(?=\s*[A-Za-z0-9])")
-        text = unary_minus_pattern.sub(lambda m: (" " if m.group(1).strip()=="" else m.group(1)) + "minus ", text)
-
+        text = _RE_WHITESPACE.sub(" ", text).strip()
         return text
 
     def is_active(self) -> bool:
@@ -370,7 +467,7 @@ class TTSManager:
             self.is_synthesizing or
             self.is_playing or
             not self.queue.empty() or
-            bool(self.text_buffer)
+            bool(self.text_buffer_parts)
         )
 
     def get_status(self) -> dict:
@@ -379,8 +476,8 @@ class TTSManager:
             "is_synthesizing": self.is_synthesizing,
             "is_playing": self.is_playing,
             "queue_size": self.queue.qsize(),
-            "buffer_size": len(self.text_buffer),
-            "buffer_words": len(self.text_buffer.split()) if self.text_buffer else 0,
+            "buffer_size": self._buf_chars,
+            "buffer_words": self._buf_words,
             "is_active": self.is_active()
         }
 
@@ -399,10 +496,34 @@ class TTSManager:
             "buffer_timeout": self.buffer_timeout
         }
 
+    def _now(self) -> float:
+        """Event loop clock, without looking the loop up on every call."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop.time()
+
     def _ensure_worker(self):
         if self.worker_task is None or self.worker_task.done():
             self.worker_task = asyncio.create_task(self._worker())
 
+    def _notify(self, ws: WebSocket, message: str):
+        """Queue a serialized status message for ws without waiting for the send."""
+        self._notify_queue.put_nowait((ws, message))
+        if self._notify_task is None or self._notify_task.done():
+            self._notify_task = asyncio.create_task(self._send_notifications())
+
+    async def _send_notifications(self):
+        # Exits once the queue is drained; _notify starts a new task for the next message
+        while not self._notify_queue.empty():
+            ws, message = self._notify_queue.get_nowait()
+            if ws in self._dead_sockets:
+                continue
+            try:
+                await asyncio.wait_for(ws.send_text(message), timeout=self.NOTIFY_TIMEOUT)
+            except Exception:
+                # A closed or stalled client must not hold up messages for the others
+                self._dead_sockets.add(ws)
+
     async def enqueue(self, ws: WebSocket, text: str):
         # ignore empty / whitespace only
         if not (text or "").strip():
@@ -419,25 +540,27 @@ class TTSManager:
                 self.buffer_flush_task = None
             
             # If this is a new WebSocket or buffer is empty, start fresh
-            if self.buffer_ws != ws or not self.text_buffer:
+            if self.buffer_ws != ws or not self.text_buffer_parts:
                 # Flush any existing buffer for different WebSocket
-                if self.text_buffer and self.buffer_ws and self.buffer_ws != ws:
+                if self.text_buffer_parts and self.buffer_ws and self.buffer_ws != ws:
                     await self._flush_buffer()
                 
                 self.buffer_ws = ws
-                self.text_buffer = ""
+                self._clear_text_buffer()
             
             # Add cleaned text to buffer
-            if self.text_buffer:
-                self.text_buffer += " " + cleaned
-            else:
-                self.text_buffer = cleaned
+            if self.text_buffer_parts:
+                self._buf_chars += 1  # joining space
+            self.text_buffer_parts.append(cleaned)
+            self._buf_chars += len(cleaned)
+            # Cleaned text is stripped with single spaces, so spaces + 1 is the word count
+            self._buf_words += cleaned.count(" ") + 1
             
-            self.last_chunk_time = asyncio.get_event_loop().time()
+            self.last_chunk_time = self._now()
             
             # Check if buffer meets thresholds for immediate processing
-            word_count = len(self.text_buffer.split())
-            char_count = len(self.text_buffer)
+            word_count = self._buf_words
+            char_count = self._buf_chars
             
             if word_count >= self.min_words or char_count >= self.min_chars:
                 # Buffer is large enough, process immediately
@@ -450,20 +573,55 @@ class TTSManager:
 
     async def _flush_buffer(self):
         """Flush the current text buffer to the synthesis queue."""
-        if self.text_buffer and self.buffer_ws:
-            cleaned = self._clean_text(self.text_buffer)
-            if cleaned:
-                await self.queue.put((self.buffer_ws, cleaned))
-            self.text_buffer = ""
+        if self.text_buffer_parts and self.buffer_ws:
+            # Parts were cleaned in enqueue() and are stripped and non-empty, so joining
+            # them with single spaces is already normalized; no second cleaning pass
+            text = " ".join(self.text_buffer_parts)
+            # Long text goes out sentence-sized, so the first sentence starts playing sooner
+            for piece in _split_sentences(text, self.max_chars):
+                await self._queue_utterance(self.buffer_ws, piece)
+            self._clear_text_buffer()
             self.buffer_ws = None
 
+    async def _queue_utterance(self, ws: WebSocket, text: str):
+        voice = self.get_voice()
+        source = self._pcm_cache.get((text, voice))
+        if source is None:
+            tail = self._tail
+            # Batch with the previous utterance if it is still waiting for a download slot:
+            # one request instead of two, and no extra wait since it had not started
+            if tail is not None and tail[0] is ws and tail[1].voice == voice and tail[1].extend(text, self.max_chars):
+                return
+            # Start downloading now; the worker still plays utterances in queue order
+            source = _Mp3Prefetch(text, voice, self._fetch_limit)
+            self._tail = (ws, source)
+        else:
+            self._tail = None
+        await self.queue.put((ws, source))
+
+    def _clear_text_buffer(self):
+        self.text_buffer_parts = []
+        self._buf_chars = 0
+        self._buf_words = 0
+
+    async def wait_until_idle(self):
+        """Flush buffered text, then wait until everything queued has been played."""
+        async with self.lock:
+            if self.buffer_flush_task and not self.buffer_flush_task.done():
+                self.buffer_flush_task.cancel()
+                self.buffer_flush_task = None
+            await self._flush_buffer()
+        self._ensure_worker()
+        await self.queue.join()
+        await asyncio.to_thread(self.streamer.drain)
+
     async def _delayed_flush(self):
         """Wait for timeout then flush buffer if no new chunks arrive."""
         try:
             await asyncio.sleep(self.buffer_timeout)
             async with self.lock:
                 # Check if we still have the same content (no new chunks arrived)
-                current_time = asyncio.get_event_loop().time()
+                current_time = self._now()
                 if (current_time - self.last_chunk_time) >= self.buffer_timeout:
                     await self._flush_buffer()
         except asyncio.CancelledError:
@@ -471,69 +629,75 @@ class TTSManager:
             pass
 
     async def _worker(self):
-        # Simple reliable sequential worker (prefetch removed for correctness)
+        # Sequential decode/playback; MP3 downloads were already started at flush time
         while True:
-            ws, text = await self.queue.get()
+            ws, source = await self.queue.get()
             try:
                 self.is_synthesizing = True
-                await self._synthesize_one(ws, text)
+                if isinstance(source, bytes):
+                    await self._play_cached(ws, source)
+                else:
+                    self._current_audio = source
+                    await self._synthesize_one(ws, source)
             # except Exception as e:
             #     print(f"[TTS] worker error: {e}")
             finally:
+                self._current_audio = None
                 self.is_synthesizing = False
                 self.queue.task_done()
 
-    async def _synthesize_one(self, ws: WebSocket, text: str) -> None:
+    async def _emit_pcm(self, data: bytes | memoryview):
+        """Queue PCM for playback without blocking the event loop on backpressure."""
+        if self.streamer.has_room():
+            self.streamer.add_chunk(data)
+        else:
+            # Playback is behind: wait for room on a worker thread so other tasks keep running
+            await asyncio.to_thread(self.streamer.add_chunk, data)
+
+    async def _play_cached(self, ws: WebSocket, pcm: bytes) -> None:
+        """Queue an already decoded utterance for playback."""
+        self.current_cancel_event = asyncio.Event()
+        cancel_event = self.current_cancel_event
+        self._notify(ws, _MSG_TTS_START)
+        # Chunked like live audio so a barge-in only waits for one chunk
+        view = memoryview(pcm)
+        for i in range(0, len(view), self.streamer.fixed_chunk_size):
+            if cancel_event.is_set():
+                break
+            await self._emit_pcm(view[i:i + self.streamer.fixed_chunk_size])
+            # interrupt() may land while _emit_pcm waits for room
+            if cancel_event.is_set():
+                break
+        if not cancel_event.is_set():
+            self._notify(ws, _MSG_TTS_COMPLETE)
+
+    async def _synthesize_one(self, ws: WebSocket, audio: _Mp3Prefetch) -> None:
         """Stream one utterance using incremental ffmpeg decode to reduce CPU spikes/stutter.
 
         Falls back to legacy re-decode approach if ffmpeg is unavailable.
         """
-        import shutil
-        import struct
-
         self.current_cancel_event = asyncio.Event()
-        voice = self.get_voice()
-        communicate = edge_tts.Communicate(text, voice)
-        self.streamer.is_raw_pcm = True
 
         ffmpeg_path = shutil.which("ffmpeg")
         if not ffmpeg_path:
-            await self._synthesize_one_fallback(ws, text)
+            await self._synthesize_one_fallback(ws, audio)
             return
 
-        cmd = [
-            ffmpeg_path,
-            "-loglevel", "error",
-            "-f", "mp3",
-            "-i", "pipe:0",
-            "-f", "s16le",
-            "-acodec", "pcm_s16le",
-            "-ac", str(self.streamer.target_channels),
-            "-ar", str(self.streamer.target_rate),
-            "pipe:1",
-        ]
+        cmd = _ffmpeg_pcm_cmd(ffmpeg_path, self.streamer.target_channels, self.streamer.target_rate)
         try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
+            proc = await self._rent_decoder(cmd)
         except NotImplementedError:
             # Event loop doesn't support subprocess (common on Windows with certain loops)
-            await self._synthesize_one_fallback(ws, text)
+            await self._synthesize_one_fallback(ws, audio)
             return
         except Exception as e:
             # Any other spawn error -> fallback to legacy streaming
             print(f"[TTS] ffmpeg spawn error: {e}. Falling back to legacy path.")
-            await self._synthesize_one_fallback(ws, text)
+            await self._synthesize_one_fallback(ws, audio)
             return
 
         # Only announce start once subprocess started successfully
-        try:
-            await ws.send_json({"type": "tts_start", "message": "TTS streaming started."})
-        except Exception:
-            pass
+        self._notify(ws, _MSG_TTS_START)
 
         leading_trim_applied = False
         silence_leadin_ms = 40
@@ -547,14 +711,12 @@ class TTSManager:
 
         async def feed_mp3():
             try:
-                async for part in communicate.stream():  # type: ignore[assignment]
+                async for data_part in audio:
                     if self.current_cancel_event.is_set():
                         break
-                    if isinstance(part, dict) and part.get("type") == "audio":
-                        data_part = part.get("data") or b""
-                        if data_part and proc.stdin:
-                            proc.stdin.write(data_part)
-                            await proc.stdin.drain()
+                    if proc.stdin:
+                        proc.stdin.write(data_part)
+                        await proc.stdin.drain()
                     await asyncio.sleep(0)
             except Exception as e:
                 print(f"[TTS] feed error: {e}")
@@ -566,7 +728,10 @@ class TTSManager:
                         pass
 
         async def read_pcm():
-            nonlocal leading_trim_applied
+            nonlocal leading_trim_applied, record
+            # Reads are coalesced into EMIT_CHUNK-sized queue items: fewer queue operations
+            # and worker wake-ups, and each wake-up has a whole chunk ready to write
+            pending = bytearray()
             try:
                 while True:
                     if self.current_cancel_event.is_set():
@@ -581,25 +746,31 @@ class TTSManager:
                         if len(initial_buffer) < min_start_bytes:
                             continue
                         # Trim leading silence
-                        sample_count = len(initial_buffer) // 2
                         max_trim_samples = int((silence_leadin_ms / 1000.0) * self.streamer.target_rate) * self.streamer.target_channels
-                        trim_samples = 0
-                        for i in range(min(sample_count, max_trim_samples)):
-                            sample = struct.unpack_from('<h', initial_buffer, i * 2)[0]
-                            if abs(sample) > silence_energy_threshold:
-                                trim_samples = i
-                                break
-                        else:
-                            trim_samples = min(sample_count, max_trim_samples)
-                        pcm_to_write = initial_buffer[trim_samples*2:]
+                        trim_samples = _leading_silence_samples(initial_buffer, max_trim_samples, silence_energy_threshold)
+                        # Zero-copy view; initial_buffer is never resized after this point
+                        pcm_to_write = memoryview(initial_buffer)[trim_samples*2:]
                         leading_trim_applied = True
+                        if record is not None:
+                            record += pcm_to_write
                         for i in range(0, len(pcm_to_write), EMIT_CHUNK):
-                            self.streamer.add_chunk(pcm_to_write[i:i+EMIT_CHUNK])
+                            await self._emit_pcm(pcm_to_write[i:i+EMIT_CHUNK])
                     else:
-                        self.streamer.add_chunk(chunk)
+                        if record is not None:
+                            record += chunk
+                        pending += chunk
+                        if len(pending) >= EMIT_CHUNK:
+                            # Hand the buffer over instead of copying it
+                            await self._emit_pcm(pending)
+                            pending = bytearray()
+                if pending and not self.current_cancel_event.is_set():
+                    await self._emit_pcm(pending)
             except Exception as e:
                 print(f"[TTS] read error: {e}")
 
+        # Decoded PCM of short utterances is kept for the next time the same text comes up
+        record: Optional[bytearray] = bytearray() if self._pcm_cache.accepts(audio.key) else None
+
         feeder = asyncio.create_task(feed_mp3())
         reader = asyncio.create_task(read_pcm())
         await asyncio.wait({feeder, reader}, return_when=asyncio.ALL_COMPLETED)
@@ -607,73 +778,136 @@ class TTSManager:
             await proc.wait()
         except Exception:
             pass
+        if record and audio.complete and proc.returncode == 0 and not self.current_cancel_event.is_set():
+            # Re-check: text may have been batched onto this utterance after recording started
+            if self._pcm_cache.accepts(audio.key):
+                self._pcm_cache.put(audio.key, bytes(record))
 
         if not self.current_cancel_event.is_set():
-            try:
-                await ws.send_json({"type": "tts_complete", "message": "TTS streaming completed."})
-            except Exception:
-                pass
+            self._notify(ws, _MSG_TTS_COMPLETE)
+
+    @staticmethod
+    async def _spawn_decoder(cmd: list[str]) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
 
-    async def _synthesize_one_fallback(self, ws: WebSocket, text: str) -> None:
-        """Legacy decode path kept as fallback (full re-decodes)."""
-        self.current_cancel_event = asyncio.Event()
-        voice = self.get_voice()
-        communicate = edge_tts.Communicate(text, voice)
-        self.streamer.is_raw_pcm = True
-        mp3_accumulator = b""
-        last_pcm_len = 0
-        min_initial_bytes = 3000
-        min_delta_bytes = 1800
+    async def _rent_decoder(self, cmd: list[str]) -> asyncio.subprocess.Process:
+        """Return a ready ffmpeg decoder for cmd and start warming up the next one.
+
+        A decoder handles a single utterance (its stdin EOF ends the stream), so
+        each rented process is replaced by a fresh spare in the background.
+        """
+        if self._spare_decoder_task is not None:
+            await self._spare_decoder_task
+            self._spare_decoder_task = None
+        spare, self._spare_decoder = self._spare_decoder, None
+        if spare is not None and spare[0] == cmd and spare[1].returncode is None:
+            proc = spare[1]
+        else:
+            if spare is not None and spare[1].returncode is None:
+                spare[1].kill()
+            # Spawn errors (e.g. NotImplementedError on selector loops) reach the caller
+            proc = await self._spawn_decoder(cmd)
+        self._spare_decoder_task = asyncio.create_task(self._prespawn_decoder(cmd))
+        return proc
+
+    async def prewarm(self):
+        """Cache the voice and start the audio stream and an ffmpeg decoder before the first utterance."""
+        self.get_voice()
+        self.streamer.start()
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path and self._spare_decoder is None and self._spare_decoder_task is None:
+            cmd = _ffmpeg_pcm_cmd(ffmpeg_path, self.streamer.target_channels, self.streamer.target_rate)
+            # _rent_decoder() awaits this task, so an early first utterance just waits for it
+            self._spare_decoder_task = asyncio.create_task(self._prespawn_decoder(cmd))
+            await self._spare_decoder_task
+
+    async def _prespawn_decoder(self, cmd: list[str]) -> None:
         try:
-            await ws.send_json({"type": "tts_start", "message": "TTS streaming started (fallback)."})
+            self._spare_decoder = (cmd, await self._spawn_decoder(cmd))
         except Exception:
-            pass
+            self._spare_decoder = None
+
+    async def _synthesize_one_fallback(self, ws: WebSocket, audio: _Mp3Prefetch) -> None:
+        """Stream one utterance through a blocking ffmpeg pipe.
+
+        Used when the running event loop cannot spawn subprocesses. MP3 parts are
+        written to ffmpeg as they arrive and a worker thread forwards the decoded
+        PCM, so each byte is decoded exactly once.
+        """
+        self.current_cancel_event = asyncio.Event()
+        cancel_event = self.current_cancel_event
+
+        ffmpeg_path = shutil.which("ffmpeg")
+        if not ffmpeg_path:
+            print("[TTS] ffmpeg not found; cannot decode synthesized audio.")
+            return
+        cmd = _ffmpeg_pcm_cmd(ffmpeg_path, self.streamer.target_channels, self.streamer.target_rate)
         try:
-            async for part in communicate.stream():  # type: ignore[assignment]
-                if self.current_cancel_event.is_set():
+            # Unbuffered pipes so MP3 parts reach ffmpeg immediately and PCM is read as soon as it is ready
+            proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0
+            )
+        except Exception as e:
+            print(f"[TTS] ffmpeg spawn error: {e}")
+            return
+
+        self._notify(ws, _MSG_TTS_START_FALLBACK)
+
+        def read_pcm():
+            # The unbuffered pipe returns short reads; fill whole chunks in place through a
+            # memoryview window, then hand each filled buffer over without copying it
+            size = self.streamer.fixed_chunk_size
+            buf = bytearray(size)
+            view = memoryview(buf)
+            filled = 0
+            try:
+                while not cancel_event.is_set():
+                    n = proc.stdout.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                    if filled == size:
+                        self.streamer.add_chunk(buf)
+                        buf = bytearray(size)
+                        view = memoryview(buf)
+                        filled = 0
+                if filled and not cancel_event.is_set():
+                    self.streamer.add_chunk(view[:filled])
+            except Exception as e:
+                print(f"[TTS] fallback read error: {e}")
+
+        reader = asyncio.create_task(asyncio.to_thread(read_pcm))
+        try:
+            async for data_part in audio:
+                if cancel_event.is_set():
                     break
-                if isinstance(part, dict) and part.get("type") == "audio":
-                    data_part = part.get("data") or b""
-                    if data_part:
-                        mp3_accumulator += data_part
-                if len(mp3_accumulator) < min_initial_bytes and last_pcm_len == 0:
-                    continue
-                if len(mp3_accumulator) - last_pcm_len < min_delta_bytes:
-                    continue
-                try:
-                    seg = AudioSegment.from_mp3(io.BytesIO(mp3_accumulator))
-                    seg = seg.set_frame_rate(self.streamer.target_rate).set_channels(self.streamer.target_channels).set_sample_width(self.streamer.target_sample_width)
-                    pcm = seg.raw_data
-                    if len(pcm) > last_pcm_len:
-                        delta = pcm[last_pcm_len:]
-                        last_pcm_len = len(pcm)
-                        for i in range(0, len(delta), 3072):
-                            self.streamer.add_chunk(delta[i:i+3072])
-                except Exception:
-                    pass
+                await asyncio.to_thread(proc.stdin.write, data_part)
         except Exception as e:
             print(f"[TTS] fallback synthesis error: {e}")
-        # Final flush
-        try:
-            seg = AudioSegment.from_mp3(io.BytesIO(mp3_accumulator))
-            seg = seg.set_frame_rate(self.streamer.target_rate).set_channels(self.streamer.target_channels).set_sample_width(self.streamer.target_sample_width)
-            pcm = seg.raw_data
-            if len(pcm) > last_pcm_len:
-                delta = pcm[last_pcm_len:]
-                for i in range(0, len(delta), 3072):
-                    self.streamer.add_chunk(delta[i:i+3072])
-        except Exception:
-            pass
-        if not self.current_cancel_event.is_set():
+        finally:
             try:
-                await ws.send_json({"type": "tts_complete", "message": "TTS streaming completed (fallback)."})
+                proc.stdin.close()
             except Exception:
                 pass
+            if cancel_event.is_set():
+                proc.kill()
 
+        await reader
+        await asyncio.to_thread(proc.wait)
+
+        if not cancel_event.is_set():
+            self._notify(ws, _MSG_TTS_COMPLETE_FALLBACK)
 
     def interrupt(self):
         # Cancel current utterance and clear pending queue contents
         self.current_cancel_event.set()
+        if self._current_audio is not None:
+            self._current_audio.cancel()
         
         # Cancel any pending buffer flush
         if self.buffer_flush_task and not self.buffer_flush_task.done():
@@ -681,15 +915,18 @@ class TTSManager:
             self.buffer_flush_task = None
         
         # Clear text buffer
-        self.text_buffer = ""
+        self._clear_text_buffer()
         self.buffer_ws = None
+        self._tail = None
         
         # Clear the queue safely
         cleared_items = 0
         try:
             while not self.queue.empty():
                 try:
-                    self.queue.get_nowait()
+                    _, source = self.queue.get_nowait()
+                    if isinstance(source, _Mp3Prefetch):
+                        source.cancel()
                     self.queue.task_done()
                     cleared_items += 1
                 except asyncio.queues.QueueEmpty:
@@ -704,12 +941,21 @@ class TTSManager:
         self.is_synthesizing = False
         self.is_playing = False
         
-        self.streamer.stop()
+        # Barge-in must not wait on playback or PortAudio re-init; the stream is reused
+        self.streamer.abort()
         print("[TTS] TTS interrupted and stopped")
 
     def stop_all_sessions(self):  # compatibility for voice router if needed
         self.interrupt()
 
+    def shutdown(self):
+        """Stop playback, cancel background tasks and release the audio device."""
+        self.interrupt()
+        for task in (self.worker_task, self._notify_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self.streamer.shutdown()
+
 
 tts_manager = TTSManager()
 
@@ -720,11 +966,21 @@ async def synthesize_text(ws, text: str):
     await tts_manager.enqueue(ws, text)
 
 
+async def prewarm_tts():
+    """Get TTS ready ahead of the first utterance (voice, audio stream, decoder)."""
+    await tts_manager.prewarm()
+
+
 async def stop_tts():
     """Interrupt any ongoing and queued TTS playback."""
     tts_manager.interrupt()
 
 
+def shutdown_tts():
+    """Stop TTS and release the audio device; call once at application exit."""
+    tts_manager.shutdown()
+
+
 def is_tts_active() -> bool:
     """Check if TTS is currently synthesizing or playing audio."""
     return tts_manager.is_active()
@@ -744,7 +1000,28 @@ def get_tts_buffering_config() -> dict:
     """Get current TTS buffering configuration."""
     return tts_manager.get_buffering_config()
 
-async def test():
+
+class FakeWS:
+    """Stand-in for the client websocket in test(); prints what would be sent."""
+
+    async def send_json(self, data) -> None:
+        print(f"[FakeWS] Sending JSON: {data}")
+
+    async def send_text(self, data: str) -> None:
+        print(f"[FakeWS] Sending text: {data}")
+
+
+class SilentFakeWS(FakeWS):
+    """Discards messages, so printing does not skew timings in load tests."""
+
+    async def send_json(self, data) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        pass
+
+
+async def test(ws: Optional[FakeWS] = None):
     # chunks = [
     #     "Absolutely! Let's find those math chapters for you.\n\nAccording to the syllabus for Mathematics (11 MM-04), here are the chapters coming in Unit Test - I:\n\n*   **Sets**\n*   **Relations and Functions",
     #     "This is a test.",
@@ -759,16 +1036,34 @@ async def test():
         "(image) ![alt text](image_url) and some **bold text** with a link: [OpenAI](https://openai.com).",
     ]
 
-    class FakeWS:
-        async def send_json(self, data):
-            print(f"[FakeWS] Sending JSON: {data}")
+    ws = ws or FakeWS()
+    await prewarm_tts()
 
-    ws = FakeWS()
-    for chunk in chunks:
-        asyncio.create_task(synthesize_text(ws, chunk))
-        await asyncio.sleep(0.1)
+    # Producer/consumer like the LLM stream feeding TTS; a bounded queue gives backpressure.
+    # A single consumer, because chunks must reach synthesize_text in order.
+    pending: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=32)
+
+    async def produce():
+        for chunk in chunks:
+            await pending.put(chunk)
+        await pending.put(None)
+
+    async def consume():
+        while (chunk := await pending.get()) is not None:
+            try:
+                await synthesize_text(ws, chunk)
+            except Exception as e:
+                print(f"[TTS] test chunk failed: {e!r}")
 
-    await asyncio.sleep(50)  # Let some TTS play
+    await asyncio.gather(produce(), consume())
+    # Finish as soon as all TTS has played instead of sleeping a fixed time,
+    # but fail fast if playback stalls
+    await asyncio.wait_for(tts_manager.wait_until_idle(), timeout=30)
 
 if __name__ == "__main__":
-    asyncio.run(test())
\ No newline at end of file
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+    run(test())
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""Math notation -> speakable text for TTS.
+
+Kept free of closures and dynamic typing so the module can be compiled
+ahead of time (``mypyc utils/voice/tts_text_norm.py``); the pure-Python
+module behaves identically when no compiled build is present.
+"""
+import re
+
+# Math normalization patterns
+_RE_FRAC = re.compile(r"\\frac\s*\{([^}]+)\}\s*\{([^}]+)\}")
+_RE_LEFT = re.compile(r"\\left\s*")
+_RE_RIGHT = re.compile(r"\\right\s*")
+_WRAPPER_CMDS = (
+    "boxed", "text", "operatorname", "mathrm", "mathbf", "mathit",
+    "mathbb", "mathcal", "textrm", "textbf", "textit"
+)
+_RE_WRAPPER = re.compile(r"\\(" + "|".join(map(re.escape, _WRAPPER_CMDS)) + r")\s*\{([^{}]+)\}")
+# Common LaTeX greek letters and functions -> plain words, matched in a single scan
+_LATEX_WORDS = (
+    "pi", "theta", "alpha", "beta", "gamma", "delta", "lambda", "mu",
+    "nu", "phi", "psi", "omega", "sin", "cos", "tan", "log", "ln"
+)
+_RE_LATEX_WORD = re.compile(r"\\(" + "|".join(_LATEX_WORDS) + ")")
+_RE_STRAY_BACKSLASH = re.compile(r"\\([A-Za-z])")
+_RE_CARET = re.compile(r"(?P<base>[A-Za-z0-9_.()\[\])]+)\s*\^\s*(?P<exp>\{[^}]+\}|[A-Za-z0-9]+)")
+_RE_STANDALONE_CARET = re.compile(r"\^\s*(\{[^}]+\}|\d+|[A-Za-z]+)")
+_SUP_MAP = {
+    '⁰': '0', '¹': '1', '²': '2', '³': '3', '⁴': '4',
+    '⁵': '5', '⁶': '6', '⁷': '7', '⁸': '8', '⁹': '9',
+    '⁺': '+', '⁻': '-', '⁽': '(', '⁾': ')', 'ⁿ': 'n'
+}
+_SUP_TRANS = str.maketrans(_SUP_MAP)
+_SUP_CHARS = ''.join(map(re.escape, _SUP_MAP.keys()))
+_RE_SUP_CHAR = re.compile(f"[{_SUP_CHARS}]")
+_RE_SUPERSCRIPT = re.compile(rf"(?P<base>[A-Za-z0-9_.()\[\]{{}}]+)(?P<sup>[{_SUP_CHARS}]+)")
+_RE_SLASH = re.compile(r"(?P<left>[A-Za-z0-9()\[\]{}]+)\s*/\s*(?P<right>[A-Za-z0-9()\[\]{}]+)")
+_MATH_WORDS = frozenset({"sin","cos","tan","log","ln","pi","theta","alpha","beta","gamma","delta","lambda","phi","psi","omega","sigma","mu","nu","eta","rho","xi","zeta","k","n","m","x","y","z"})
+_RE_MINUS = re.compile(r"(?P<left>[A-Za-z0-9)\]\}]+)\s*-\s*(?P<right>[A-Za-z0-9(\[\{]+)")
+_RE_UNARY_MINUS = re.compile(r"(^|[\s(=/+*^])-(?=\s*[A-Za-z0-9])")
+# Slash/minus operands are ASCII tokens; any digit or bracket makes them math
+_RE_MATHY_CHAR = re.compile(r"[0-9()\[\]{}]")
+
+
+def _is_mathy(tok: str) -> bool:
+    """Whether a slash/minus operand looks like math rather than prose."""
+    # Cheapest checks first; the regex scans the token once in C
+    return (
+        len(tok) <= 2
+        or _RE_MATHY_CHAR.search(tok) is not None
+        or tok.lower() in _MATH_WORDS
+    )
+
+
+def _power_suffix(exp: str) -> str:
+    """Spoken form of an exponent, to follow its base."""
+    if exp == '2':
+        return " squared"
+    if exp == '3':
+        return " cubed"
+    return f" raised to the power {exp}"
+
+
+def _strip_braces(exp: str) -> str:
+    if exp.startswith('{') and exp.endswith('}'):
+        return exp[1:-1].strip()
+    return exp
+
+
+def _frac_repl(m: "re.Match[str]") -> str:
+    return f"{m.group(1)} over {m.group(2)}"
+
+
+def _caret_repl(m: "re.Match[str]") -> str:
+    return m.group('base') + _power_suffix(_strip_braces(m.group('exp')))
+
+
+def _standalone_caret_repl(m: "re.Match[str]") -> str:
+    return _power_suffix(_strip_braces(m.group(1)))
+
+
+def _superscript_repl(m: "re.Match[str]") -> str:
+    base = m.group('base')
+    # The pattern only captures mapped characters, so one C-level translate suffices
+    exp = m.group('sup').translate(_SUP_TRANS)
+    if exp:
+        return base + _power_suffix(exp)
+    return base
+
+
+def _slash_repl(m: "re.Match[str]") -> str:
+    left = m.group('left')
+    right = m.group('right')
+    if _is_mathy(left) or _is_mathy(right):
+        return f"{left} by {right}"
+    return f"{left}/{right}"
+
+
+def _minus_repl(m: "re.Match[str]") -> str:
+    left = m.group('left')
+    right = m.group('right')
+    # keep numeric ranges as hyphen; later prose step turns to 'to'
+    if left.isdigit() and right.isdigit():
+        return f"{left}-{right}"
+    if _is_mathy(left) or _is_mathy(right):
+        return f"{left} minus {right}"
+    return f"{left}-{right}"
+
+
+def _unary_minus_repl(m: "re.Match[str]") -> str:
+    lead = m.group(1)
+    return (" " if lead.strip() == "" else lead) + "minus "
+
+
+def normalize_math(text: str) -> str:
+    """Convert simple math notations to TTS-friendly phrases.
+
+    Handles:
+    - Inline math delimiters: removes '$'
+    - Caret exponents: x^2, 10^8, x^{n}
+    - Standalone exponents: ^2 -> "squared", ^8 -> "raised to the power 8"
+    - Unicode superscripts: x², 10⁸, xⁿ
+    """
+    if not text:
+        return text
+
+    # Remove inline math dollar delimiters
+    if '$' in text:
+        text = text.replace('$', '')
+
+    # Each stage below needs a specific trigger character; a plain substring test
+    # skips the regex scans for stages that cannot match
+
+    # LaTeX commands all start with a backslash
+    if '\\' in text:
+        # Handle \frac{num}{den} -> "num over den"
+        text = _RE_FRAC.sub(_frac_repl, text)
+
+        # Remove sizing wrappers like \left \right
+        text = _RE_LEFT.sub("", text)
+        text = _RE_RIGHT.sub("", text)
+
+        # Strip LaTeX formatting wrappers but keep content, e.g., \boxed{X} -> X
+        # Nested wrappers unwrap one level per pass; stop as soon as a pass changes nothing
+        for _ in range(3):
+            text, count = _RE_WRAPPER.subn(r"\2", text)
+            if not count:
+                break
+
+        # Map common LaTeX greek letters and functions to plain words
+        text = _RE_LATEX_WORD.sub(r"\1", text)
+
+        # Remove stray backslashes before letters (e.g., \x -> x)
+        text = _RE_STRAY_BACKSLASH.sub(r"\1", text)
+
+    if '^' in text:
+        # 1) Normalize caret forms like base^exp or base^{exp}
+        text = _RE_CARET.sub(_caret_repl, text)
+        # 2) Standalone ^exp (no explicit base)
+        text = _RE_STANDALONE_CARET.sub(_standalone_caret_repl, text)
+
+    # 3) Unicode superscripts after a base token
+    if _RE_SUP_CHAR.search(text):
+        text = _RE_SUPERSCRIPT.sub(_superscript_repl, text)
+
+    # 4) Prefer saying "by" instead of "slash" for math-like X/Y patterns
+    if '/' in text:
+        text = _RE_SLASH.sub(_slash_repl, text)
+
+    if '-' in text:
+        # 5) Convert binary '-' to 'minus' in math contexts; keep prose hyphens
+        text = _RE_MINUS.sub(_minus_repl, text)
+        # 6) Unary minus before number/variable -> say 'minus X'
+        text = _RE_UNARY_MINUS.sub(_unary_minus_repl, text)
+
+    return text